@@ -0,0 +1,39 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+
+from .models import Post
+
+LISTING_VERSION_KEY = 'blog:listing-version'
+
+
+def card_timeout():
+    return getattr(settings, 'BLOG_CARD_CACHE_TIMEOUT', 24 * 3600)
+
+
+def page_timeout():
+    return getattr(settings, 'BLOG_PAGE_CACHE_TIMEOUT', 60)
+
+
+def listing_version():
+    """Stamp shared by every cached listing page; a new one orphans them all."""
+    return cache.get_or_set(LISTING_VERSION_KEY, time.time_ns, None)
+
+
+def bump_listing():
+    # A fresh timestamp rather than an increment, so a stamp lost to eviction is never reused
+    cache.set(LISTING_VERSION_KEY, time.time_ns(), None)
+
+
+def bump_posts(posts):
+    """New card versions for `posts` (a queryset or list of ids), and new listing pages."""
+    if not isinstance(posts, Post.objects._queryset_class):
+        posts = Post.objects.filter(pk__in=posts)
+    posts.update(version=F('version') + 1)
+    bump_listing()
+
+
+def page_key(name, *parts):
+    return ':'.join(['blog:page', name, str(listing_version()), *map(str, parts)])
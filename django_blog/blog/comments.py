@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.db.models import Q
+
+from .models import Comment
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def page_size():
+    return getattr(settings, 'BLOG_COMMENTS_PAGE_SIZE', 20)
+
+
+def encode_cursor(comment):
+    """`<microseconds since the epoch>-<id>` of the last comment on a page."""
+    return f'{(comment.created_at - EPOCH) // timedelta(microseconds=1)}-{comment.pk}'
+
+
+def decode_cursor(cursor):
+    """(created_at, id) from encode_cursor, or ValueError."""
+    micros, _, pk = cursor.partition('-')
+    return EPOCH + timedelta(microseconds=int(micros)), int(pk)
+
+
+def comment_page(post_id, cursor=None, size=None):
+    """
+    One page of a post's comments, newest first, with their authors, and the
+    cursor for the next page (None on the last one).
+
+    Pages by keyset on (created_at, id), a seek on comment_thread_idx however
+    deep into the thread the reader is.
+    """
+    size = size or page_size()
+    comments = Comment.objects.filter(post_id=post_id).select_related('author').order_by('-created_at', '-id')
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        comments = comments.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+    comments = list(comments[:size + 1])
+    if len(comments) <= size:
+        return comments, None
+    comments = comments[:size]
+    return comments, encode_cursor(comments[-1])
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from blog import search
+
+
+class Command(BaseCommand):
+    help = 'Rewrite the full-text search document of every post, e.g. after bulk imports that skip signals.'
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Indexed {search.rebuild()} posts')
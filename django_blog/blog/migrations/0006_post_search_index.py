@@ -0,0 +1,64 @@
+from django.db import migrations
+
+# Space-separated tag names of post p, for folding into its document
+SQLITE_TAGS = (
+    "COALESCE((SELECT group_concat(t.name, ' ') FROM taggit_taggeditem ti "
+    "JOIN taggit_tag t ON t.id = ti.tag_id WHERE ti.content_type_id = %s AND ti.object_id = p.id), '')"
+)
+POSTGRES_TAGS = (
+    "COALESCE((SELECT string_agg(t.name, ' ') FROM taggit_taggeditem ti "
+    "JOIN taggit_tag t ON t.id = ti.tag_id WHERE ti.content_type_id = %s AND ti.object_id = p.id), '')"
+)
+
+
+def create_index(apps, schema_editor):
+    connection = schema_editor.connection
+    content_type = apps.get_model('contenttypes', 'ContentType').objects.filter(app_label='blog', model='post').first()
+    # No content type yet means a fresh database, so no tags either
+    content_type_id = content_type.pk if content_type else None
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                "CREATE VIRTUAL TABLE blog_post_fts USING fts5(title, tags, content, tokenize='porter unicode61')"
+            )
+            cursor.execute(
+                'INSERT INTO blog_post_fts (rowid, title, tags, content) '
+                f'SELECT p.id, p.title, {SQLITE_TAGS}, p.content FROM blog_post p',
+                [content_type_id],
+            )
+        elif connection.vendor == 'postgresql':
+            cursor.execute(
+                'CREATE TABLE blog_post_search ('
+                ' post_id bigint PRIMARY KEY REFERENCES blog_post (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED,'
+                ' document tsvector NOT NULL)'
+            )
+            cursor.execute('CREATE INDEX blog_post_search_document_idx ON blog_post_search USING GIN (document)')
+            cursor.execute(
+                'INSERT INTO blog_post_search (post_id, document) '
+                "SELECT p.id, setweight(to_tsvector('english', p.title), 'A') || "
+                f"setweight(to_tsvector('english', {POSTGRES_TAGS}), 'B') || "
+                "setweight(to_tsvector('english', p.content), 'C') FROM blog_post p",
+                [content_type_id],
+            )
+
+
+def drop_index(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('DROP TABLE IF EXISTS blog_post_fts')
+        elif connection.vendor == 'postgresql':
+            cursor.execute('DROP TABLE IF EXISTS blog_post_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_post_version'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -10,6 +10,8 @@ class Post(models.Model):
     published_date = models.DateTimeField(auto_now_add=True)
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name="posts")
     tags = TaggableManager(blank=True)
+    # Bumped by blog.signals whenever anything shown on the post's card changes; part of the card's cache key
+    version = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.title
@@ -25,5 +27,11 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Serves the newest-first keyset pages of blog.comments.comment_page
+            models.Index(fields=['post', 'created_at', 'id'], name='comment_thread_idx'),
+        ]
+
     def __str__(self):
         return f'Comment by {self.author.username} on {self.post.title}'
\ No newline at end of file
@@ -0,0 +1,157 @@
+"""
+Full-text search over posts, with tag names folded into each post's document.
+
+SQLite keeps documents in the FTS5 table blog_post_fts (rowid = post id) and
+Postgres in blog_post_search, a tsvector per post under a GIN index; both are
+created by migration 0006 and kept current by blog.signals through
+index_posts. Other databases fall back to an unranked icontains filter.
+"""
+import re
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Post
+
+POSTGRES_CONFIG = 'english'
+
+# Private-use characters around matched terms, swapped for <mark> once the text is escaped
+START, STOP = '\ue000', '\ue001'
+
+_WORD = re.compile(r'\w+')
+
+
+def highlight(text):
+    return mark_safe(escape(text).replace(START, '<mark>').replace(STOP, '</mark>'))
+
+
+def _tag_names(post):
+    return ' '.join(tag.name for tag in post.tags.all())
+
+
+def index_posts(post_ids):
+    """Rewrite the documents of `post_ids`, dropping those of posts that no longer exist."""
+    post_ids = list(post_ids)
+    if not post_ids or connection.vendor not in ('sqlite', 'postgresql'):
+        return
+    posts = Post.objects.filter(pk__in=post_ids).prefetch_related('tags')
+    placeholders = ', '.join(['%s'] * len(post_ids))
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'DELETE FROM blog_post_fts WHERE rowid IN ({placeholders})', post_ids)
+            cursor.executemany(
+                'INSERT INTO blog_post_fts (rowid, title, tags, content) VALUES (%s, %s, %s, %s)',
+                [(post.pk, post.title, _tag_names(post), post.content) for post in posts],
+            )
+        else:
+            cursor.execute(f'DELETE FROM blog_post_search WHERE post_id IN ({placeholders})', post_ids)
+            cursor.executemany(
+                'INSERT INTO blog_post_search (post_id, document) VALUES (%s, '
+                "setweight(to_tsvector(%s::regconfig, %s), 'A') || "
+                "setweight(to_tsvector(%s::regconfig, %s), 'B') || "
+                "setweight(to_tsvector(%s::regconfig, %s), 'C'))",
+                [
+                    (post.pk, POSTGRES_CONFIG, post.title, POSTGRES_CONFIG, _tag_names(post), POSTGRES_CONFIG, post.content)
+                    for post in posts
+                ],
+            )
+
+
+def rebuild():
+    """Reindex every post; returns how many there are."""
+    post_ids = list(Post.objects.values_list('pk', flat=True))
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('DELETE FROM blog_post_fts')
+        elif connection.vendor == 'postgresql':
+            cursor.execute('DELETE FROM blog_post_search')
+    for start in range(0, len(post_ids), 500):
+        index_posts(post_ids[start:start + 500])
+    return len(post_ids)
+
+
+class SearchResults:
+    """
+    Hits for one query, best first, fetched a slice at a time so Paginator
+    only ever loads one page. Each hit is a Post (author and tags loaded) with
+    `title_highlight` and `snippet` set.
+    """
+
+    def __init__(self, query):
+        self.query = query
+        # FTS5 MATCH syntax: every word must match, each as a quoted prefix
+        self.match = ' '.join(f'"{word}"*' for word in _WORD.findall(query))
+
+    def count(self):
+        if not self.match:
+            return 0
+        if connection.vendor == 'sqlite':
+            sql, params = 'SELECT count(*) FROM blog_post_fts WHERE blog_post_fts MATCH %s', [self.match]
+        elif connection.vendor == 'postgresql':
+            sql = (
+                'SELECT count(*) FROM blog_post_search '
+                'WHERE document @@ websearch_to_tsquery(%s::regconfig, %s)'
+            )
+            params = [POSTGRES_CONFIG, self.query]
+        else:
+            return self._fallback().count()
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchone()[0]
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            raise TypeError('SearchResults only supports slicing')
+        offset = index.start or 0
+        limit = (index.stop - offset) if index.stop is not None else -1
+        if not self.match or limit == 0:
+            return []
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            return self._hydrate([(post.pk, post.title, post.content[:300]) for post in self._fallback()[index]])
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                # bm25 weights per column (title, tags, content); lower is better
+                cursor.execute(
+                    'SELECT rowid, highlight(blog_post_fts, 0, %s, %s), snippet(blog_post_fts, 2, %s, %s, %s, 40) '
+                    'FROM blog_post_fts WHERE blog_post_fts MATCH %s '
+                    'ORDER BY bm25(blog_post_fts, 10.0, 5.0, 1.0), rowid DESC LIMIT %s OFFSET %s',
+                    [START, STOP, START, STOP, '…', self.match, limit, offset],
+                )
+            else:
+                options = f'StartSel={START}, StopSel={STOP}'
+                cursor.execute(
+                    'WITH query AS (SELECT websearch_to_tsquery(%s::regconfig, %s) AS tsq), '
+                    'hits AS ('
+                    '  SELECT s.post_id, ts_rank_cd(s.document, query.tsq) AS rank FROM blog_post_search s, query'
+                    '  WHERE s.document @@ query.tsq ORDER BY rank DESC, s.post_id DESC LIMIT %s OFFSET %s'
+                    ') '
+                    'SELECT p.id, ts_headline(%s::regconfig, p.title, query.tsq, %s), '
+                    'ts_headline(%s::regconfig, p.content, query.tsq, %s) '
+                    'FROM hits JOIN blog_post p ON p.id = hits.post_id CROSS JOIN query '
+                    'ORDER BY hits.rank DESC, p.id DESC',
+                    [
+                        POSTGRES_CONFIG, self.query, None if limit < 0 else limit, offset,
+                        POSTGRES_CONFIG, options + ', HighlightAll=true',
+                        POSTGRES_CONFIG, options + ', MaxFragments=2, MaxWords=40, MinWords=15',
+                    ],
+                )
+            return self._hydrate(cursor.fetchall())
+
+    def _fallback(self):
+        posts = Post.objects.order_by('-published_date', '-pk')
+        for word in _WORD.findall(self.query):
+            tagged = Post.objects.filter(tags__name__icontains=word).values('pk')
+            posts = posts.filter(Q(title__icontains=word) | Q(content__icontains=word) | Q(pk__in=tagged))
+        return posts
+
+    def _hydrate(self, rows):
+        posts = Post.objects.select_related('author').prefetch_related('tags').in_bulk([row[0] for row in rows])
+        hits = []
+        for post_id, title, snippet in rows:
+            post = posts.get(post_id)
+            if post is not None:
+                post.title_highlight, post.snippet = highlight(title), highlight(snippet)
+                hits.append(post)
+        return hits
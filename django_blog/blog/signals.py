@@ -0,0 +1,55 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from taggit.models import Tag, TaggedItem
+
+from .cache import bump_listing, bump_posts
+from .models import Post, Comment
+from .search import index_posts
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    if created:
+        bump_listing()
+    else:
+        bump_posts([instance.pk])
+    index_posts([instance.pk])
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    bump_listing()
+    index_posts([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    bump_posts([instance.post_id])
+
+
+@receiver(m2m_changed, sender=TaggedItem)
+def post_tags_changed(sender, instance, action, **kwargs):
+    if isinstance(instance, Post) and action in ('post_add', 'post_remove', 'post_clear'):
+        bump_posts([instance.pk])
+        index_posts([instance.pk])
+
+
+# pre_delete, since the tag's TaggedItem rows are gone by post_delete
+@receiver([post_save, pre_delete], sender=Tag)
+def tag_changed(sender, instance, signal, **kwargs):
+    tagged = list(Post.objects.filter(tags=instance).values_list('pk', flat=True))
+    bump_posts(tagged)
+    if signal is post_save:
+        index_posts(tagged)
+    else:
+        # The deletion runs in a transaction; reindex once the tag is gone from the posts
+        transaction.on_commit(lambda: index_posts(tagged))
+
+
+@receiver(post_save, sender=User)
+def author_saved(sender, instance, created, update_fields, **kwargs):
+    # Cards show the author's username; logins only touch last_login
+    if not created and set(update_fields or ()) != {'last_login'}:
+        bump_posts(Post.objects.filter(author=instance))
@@ -1,3 +1,150 @@
-from django.test import TestCase
+import re
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .models import Post, Comment
+
+
+class PostDetailQueryTestCase(TestCase):
+    def setUp(self):
+        self.authors = [User.objects.create_user(username=f'author{n}') for n in range(20)]
+        self.post = Post.objects.create(title='Post', content='Body', author=self.authors[0])
+
+    def add_comments(self, count):
+        Comment.objects.bulk_create(
+            Comment(post=self.post, author=self.authors[n % len(self.authors)], content=f'Comment {n}')
+            for n in range(count)
+        )
+
+    def test_query_count_does_not_grow_with_comments(self):
+        url = reverse('post-detail', kwargs={'pk': self.post.pk})
+        self.add_comments(1)
+        with self.assertNumQueries(3):
+            self.client.get(url)
+
+        self.add_comments(999)
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertContains(response, 'Comments (1000)')
+        self.assertContains(response, 'author19')
+
+
+@override_settings(BLOG_COMMENTS_PAGE_SIZE=3)
+class CommentPaginationTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='user')
+        self.post = Post.objects.create(title='Post', content='Body', author=self.user)
+        Comment.objects.bulk_create(
+            Comment(post=self.post, author=self.user, content=f'Comment {n}') for n in range(8)
+        )
+
+    def shown(self, response):
+        return re.findall(r'Comment (\d+)', response.content.decode())
+
+    def test_newest_page_then_fragments_until_the_end(self):
+        response = self.client.get(reverse('post-detail', kwargs={'pk': self.post.pk}))
+        self.assertContains(response, 'Comments (8)')
+        seen = self.shown(response)
+        self.assertEqual(seen, ['7', '6', '5'])
+
+        while (match := re.search(r'href="([^"]+)" data-more-comments', response.content.decode())):
+            response = self.client.get(match.group(1).replace('&amp;', '&'))
+            self.assertNotContains(response, '<html')
+            seen += self.shown(response)
+        self.assertEqual(seen, [str(n) for n in range(7, -1, -1)])
+
+    def test_bad_requests(self):
+        url = reverse('post-comments', kwargs={'pk': self.post.pk})
+        self.assertEqual(self.client.get(url, {'cursor': 'nonsense'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('post-comments', kwargs={'pk': 999})).status_code, 404)
+
+
+class ListingCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.posts = [Post.objects.create(title=f'Post {n}', content='Body', author=self.author) for n in range(3)]
+        self.posts[0].tags.add('Django Tips')
+
+    def test_anonymous_pages_come_from_cache(self):
+        self.client.get(reverse('home'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('home'))
+        self.assertContains(response, 'Post 2')
+
+        response = self.client.get(reverse('tag-posts', kwargs={'tag_slug': 'django-tips'}))
+        self.assertContains(response, 'Posts tagged "Django Tips"')
+        self.assertNotContains(response, 'Post 1')
+        with self.assertNumQueries(0):
+            self.client.get(reverse('tag-posts', kwargs={'tag_slug': 'django-tips'}))
+
+    def test_changes_invalidate_cards_and_pages(self):
+        self.client.get(reverse('home'))
+        Comment.objects.create(post=self.posts[1], author=self.author, content='Hi')
+        self.assertContains(self.client.get(reverse('home')), '1 comment')
+
+        self.posts[2].tags.add('news')
+        self.assertContains(self.client.get(reverse('home')), 'href="/tags/news/"')
+
+        post = Post.objects.get(pk=self.posts[2].pk)
+        post.title = 'Renamed'
+        post.save()
+        self.assertContains(self.client.get(reverse('home')), 'Renamed')
+
+        self.author.username = 'writer'
+        self.author.save()
+        self.assertNotContains(self.client.get(reverse('home')), '<strong>author</strong>')
+
+    def test_cards_render_once_and_signed_in_pages_keep_their_links(self):
+        self.client.force_login(self.author)
+        self.client.get(reverse('home'))
+        with self.assertNumQueries(4):  # session, user, count, page
+            response = self.client.get(reverse('home'))
+        self.assertContains(response, reverse('post-update', kwargs={'pk': self.posts[0].pk}))
+
+
+class SearchTestCase(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.guide = Post.objects.create(title='Deploying Django', content='Use <gunicorn> behind nginx.', author=self.author)
+        self.notes = Post.objects.create(title='Weekly notes', content='Mentions deploying once.', author=self.author)
+        self.other = Post.objects.create(title='Cooking', content='Pasta recipes', author=self.author)
+        self.other.tags.add('Italian Food')
+
+    def search(self, q, **params):
+        return self.client.get(reverse('search-posts'), {'q': q, **params})
+
+    def test_ranked_highlighted_and_escaped(self):
+        response = self.search('deploy')
+        self.assertEqual([post.pk for post in response.context['results']], [self.guide.pk, self.notes.pk])
+        self.assertContains(response, '<mark>Deploying</mark> Django')
+        self.assertContains(response, '&lt;gunicorn&gt;')
+
+    def test_tags_are_searchable_and_follow_edits(self):
+        self.assertEqual([post.pk for post in self.search('italian').context['results']], [self.other.pk])
+        self.other.tags.set(['dinner'])
+        self.assertFalse(self.search('italian').context['results'])
+        self.assertTrue(self.search('dinner').context['results'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other.tags.get().delete()
+        self.assertFalse(self.search('dinner').context['results'])
+
+        self.guide.delete()
+        self.assertEqual([post.pk for post in self.search('deploying').context['results']], [self.notes.pk])
+
+    def test_empty_query_and_pagination(self):
+        self.assertIsNone(self.search('  ').context['page_obj'])
+        self.assertFalse(self.search('"*').context['results'])
+
+        Post.objects.bulk_create(Post(title=f'Bulk {n}', content='Imported', author=self.author) for n in range(13))
+        self.assertFalse(self.search('imported').context['results'])
+        call_command('rebuild_search_index', stdout=StringIO())
+        response = self.search('imported', page=2)
+        self.assertEqual(len(response.context['results']), 1)
+        self.assertEqual(response.context['page_obj'].paginator.count, 13)
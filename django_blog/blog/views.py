@@ -1,5 +1,7 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import HttpResponseForbidden
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, HttpResponseForbidden
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
@@ -7,9 +9,12 @@ from django.contrib.auth.forms import AuthenticationForm
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.urls import reverse_lazy
-from django.db.models import Q
+from taggit.models import Tag
 
+from .cache import card_timeout, page_key, page_timeout
+from .comments import comment_page
 from .models import Post, Comment
+from .search import SearchResults
 from .forms import UserRegisterForm, PostForm, CommentForm
 
 
@@ -74,19 +79,72 @@ def profile_view(request):
     return render(request, 'blog/profile.html', context)
 
 
+class CachedPageMixin:
+    """
+    Serves anonymous GETs of a listing from a cached copy of the whole rendered
+    page, keyed by page number and the listing version blog.signals bumps on
+    every change. Signed-in visitors get Edit/Delete links, so they always render.
+    """
+    page_cache_name = None
+
+    def get(self, request, *args, **kwargs):
+        page = request.GET.get(self.page_kwarg, '1')
+        if request.user.is_authenticated or not page.isdigit():
+            return super().get(request, *args, **kwargs)
+        key = page_key(self.page_cache_name, *self.kwargs.values(), page)
+        content = cache.get(key)
+        if content is not None:
+            return HttpResponse(content)
+        response = super().get(request, *args, **kwargs)
+        response.add_post_render_callback(lambda rendered: cache.set(key, rendered.content, page_timeout()))
+        return response
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['card_cache_timeout'] = card_timeout()
+        return context
+
+
 # Landing page view
-class PostListView(ListView):
-    model = Post
+class PostListView(CachedPageMixin, ListView):
+    queryset = Post.objects.select_related('author')
     template_name = 'blog/post_list.html'
     context_object_name = 'posts'
     ordering = ['-published_date']
     paginate_by = 12
+    page_cache_name = 'posts'
 
 
 class PostDetailView(DetailView):
     model = Post
     template_name = 'blog/post_detail.html'
 
+    def get_queryset(self):
+        return Post.objects.select_related('author')
+
+    def get_context_data(self, **kwargs):
+        # Only the newest page of comments; post_comments serves the rest on demand
+        context = super().get_context_data(**kwargs)
+        context['comments'], context['next_cursor'] = comment_page(self.object.pk)
+        context['comment_count'] = self.object.comments.count()
+        return context
+
+
+def post_comments(request, pk):
+    """The page of comments after `?cursor=`, as an HTML fragment for the post page to append."""
+    if not Post.objects.filter(pk=pk).exists():
+        raise Http404
+    try:
+        comments, next_cursor = comment_page(pk, request.GET.get('cursor'))
+    except (ValueError, OverflowError):
+        return HttpResponseBadRequest('Invalid cursor')
+    context = {
+        'post_id': pk,
+        'comments': comments,
+        'next_cursor': next_cursor,
+    }
+    return render(request, 'blog/comment_list.html', context)
+
 
 class PostCreateView(LoginRequiredMixin, CreateView):
     model = Post
@@ -161,28 +219,30 @@ class CommentDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
 def search_posts(request):
     query = request.GET.get('q', '').strip()
 
-    results = Post.objects.filter(
-        Q(title__icontains=query) |
-        Q(content__icontains=query) |
-        Q(tags__name__icontains=query)
-    ).distinct()
+    # An empty query matches nothing rather than every post
+    page_obj = Paginator(SearchResults(query), 12).get_page(request.GET.get('page')) if query else None
 
     context ={
-        'results': results,
+        'page_obj': page_obj,
+        'results': page_obj.object_list if page_obj else [],
+        'is_paginated': bool(page_obj and page_obj.has_other_pages()),
         'query': query,
         'title': f"Search results for '{query}'"
     }
     return render(request, 'blog/search_results.html', context)
 
 
-class PostByTagListView(ListView):
+class PostByTagListView(CachedPageMixin, ListView):
     template_name = 'blog/tag_posts.html'
     context_object_name = 'posts'
+    paginate_by = 12
+    page_cache_name = 'tag'
 
     def get_queryset(self):
-        return Post.objects.filter(tags__slug=self.kwargs['tag_slug'])
+        self.tag = get_object_or_404(Tag, slug=self.kwargs['tag_slug'])
+        return Post.objects.filter(tags=self.tag).select_related('author').order_by('-published_date')
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["tag_name"] = self.kwargs["tag_name"]   # pass tag to template
+        context["tag_name"] = self.tag.name   # pass tag to template
         return context
\ No newline at end of file
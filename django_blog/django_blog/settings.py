@@ -12,10 +12,14 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 import os
 from pathlib import Path
+import sys
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Apps shared by every project in the repository (profiling) live in <repo>/shared
+sys.path.append(str(BASE_DIR.parent / 'shared'))
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -41,9 +45,11 @@ INSTALLED_APPS = [
     'blog',
     'widget_tweaks',
     'taggit',
+    'profiling',
 ]
 
 MIDDLEWARE = [
+    'profiling.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -142,6 +148,15 @@ STORAGES = {
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Comments rendered with a post, and per "Load more" fragment after that
+BLOG_COMMENTS_PAGE_SIZE = 20
+
+# Listing caches (blog.cache). Post cards are keyed by Post.version, so they can live long;
+# whole anonymous pages share one stamp in the cache, which needs a cache shared by every
+# process (Redis, Memcached) to invalidate everywhere, so keep their timeout short
+BLOG_CARD_CACHE_TIMEOUT = 24 * 3600
+BLOG_PAGE_CACHE_TIMEOUT = 60
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
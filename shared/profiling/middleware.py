@@ -0,0 +1,136 @@
+import cProfile
+import io
+import pstats
+import random
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from .recorder import recorder
+
+# Only one profiler can be active per process, so concurrent slow requests take turns
+_profiler_lock = threading.Lock()
+
+_WHITESPACE = re.compile(r'\s+')
+_IN_LIST = re.compile(r'\bIN \((?:%s, )*%s\)', re.IGNORECASE)
+
+
+def fingerprint(sql):
+    """The statement with whitespace and IN lists collapsed, so one N+1 loop shares one fingerprint."""
+    return _IN_LIST.sub('IN (...)', _WHITESPACE.sub(' ', sql).strip())
+
+
+class QueryTimer:
+    """execute_wrapper that counts, times and fingerprints every query run through it."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def duplicates(self):
+        """[{'sql', 'count'}] for fingerprints repeated at least PROFILING_N_PLUS_ONE_THRESHOLD times."""
+        threshold = getattr(settings, 'PROFILING_N_PLUS_ONE_THRESHOLD', 5)
+        return [
+            {'sql': sql, 'count': count}
+            for sql, count in self.fingerprints.most_common() if count >= threshold
+        ]
+
+
+class ProfilingMiddleware:
+    """
+    Records query count, repeated query fingerprints, DB time, render time and
+    response size for every request into profiling.recorder.
+
+    Render time covers TemplateResponse rendering, which includes DRF's
+    serialization to JSON; templates rendered inside the view count as view
+    time. A PROFILING_CPROFILE_SAMPLE_RATE share of requests also run under
+    cProfile, and the top of the profile is kept when they take at least
+    PROFILING_SLOW_MS.
+
+    Goes first in MIDDLEWARE so the rest of the stack is measured too.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = QueryTimer()
+        profiler = self._start_profiler()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timer))
+                response = self.get_response(request)
+        finally:
+            total_ms = (time.perf_counter() - started) * 1000
+            if profiler is not None:
+                profiler.disable()
+                _profiler_lock.release()
+
+        match = request.resolver_match
+        if match is not None and 'profiling' in match.app_names:
+            return response
+        render = getattr(request, '_profiling_render', None)
+        recorder.add({
+            'timestamp': time.time(),
+            'method': request.method,
+            'path': request.path,
+            'view': (match.view_name or match.route) if match else None,
+            'status': response.status_code,
+            'total_ms': round(total_ms, 2),
+            'db_ms': round(timer.seconds * 1000, 2),
+            'render_ms': round(render[1] - render[0], 2) if render and len(render) == 2 else None,
+            'queries': timer.count,
+            'duplicates': timer.duplicates(),
+            'size': None if response.streaming else len(response.content),
+            'profile': self._report(profiler) if profiler and total_ms >= self.slow_ms else None,
+        })
+        return response
+
+    def process_template_response(self, request, response):
+        # The handler renders right after the last of these hooks returns
+        request._profiling_render = [time.perf_counter() * 1000]
+        response.add_post_render_callback(lambda rendered: request._profiling_render.append(time.perf_counter() * 1000))
+        return response
+
+    @property
+    def slow_ms(self):
+        return getattr(settings, 'PROFILING_SLOW_MS', 500)
+
+    def _start_profiler(self):
+        rate = getattr(settings, 'PROFILING_CPROFILE_SAMPLE_RATE', 0)
+        if not rate or random.random() >= rate or not _profiler_lock.acquire(blocking=False):
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler (a debugger, coverage) already owns the hook
+            _profiler_lock.release()
+            return None
+        return profiler
+
+    def _report(self, profiler):
+        output = io.StringIO()
+        stats = pstats.Stats(profiler, stream=output)
+        stats.sort_stats('cumulative').print_stats(getattr(settings, 'PROFILING_CPROFILE_LINES', 30))
+        return output.getvalue()
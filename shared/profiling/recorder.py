@@ -0,0 +1,62 @@
+import threading
+from collections import deque
+
+from django.conf import settings
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Recorder:
+    """Ring buffer of the last PROFILING_BUFFER_SIZE request records, shared by every thread of the process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._records = None
+
+    def _buffer(self):
+        if self._records is None:
+            self._records = deque(maxlen=getattr(settings, 'PROFILING_BUFFER_SIZE', 500))
+        return self._records
+
+    def add(self, record):
+        with self._lock:
+            self._buffer().append(record)
+
+    def records(self, limit=None):
+        """Newest first."""
+        with self._lock:
+            records = list(self._buffer())
+        records.reverse()
+        return records[:limit] if limit else records
+
+    def clear(self):
+        with self._lock:
+            self._records = None
+
+    def summary(self):
+        """Per-view aggregates over everything in the buffer, slowest p99 first."""
+        by_view = {}
+        for record in self.records():
+            by_view.setdefault(record['view'], []).append(record)
+        views = []
+        for view, records in by_view.items():
+            totals = [record['total_ms'] for record in records]
+            queries = [record['queries'] for record in records]
+            views.append({
+                'view': view,
+                'requests': len(records),
+                'p50_ms': round(percentile(totals, 50), 2),
+                'p99_ms': round(percentile(totals, 99), 2),
+                'db_ms': round(sum(record['db_ms'] for record in records) / len(records), 2),
+                'queries': round(sum(queries) / len(records), 1),
+                'max_queries': max(queries),
+                'n_plus_one': sum(1 for record in records if record['duplicates']),
+            })
+        return sorted(views, key=lambda view: -view['p99_ms'])
+
+
+recorder = Recorder()
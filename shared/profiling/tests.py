@@ -0,0 +1,80 @@
+import json
+from types import SimpleNamespace
+
+from django.contrib import admin
+from django.contrib.contenttypes.models import ContentType
+from django.http import HttpResponse
+from django.template import engines
+from django.template.response import SimpleTemplateResponse
+from django.test import RequestFactory, TestCase, modify_settings, override_settings
+from django.urls import include, path
+
+from .middleware import fingerprint
+from .recorder import recorder
+from .views import dump
+
+
+def n_plus_one(request):
+    for pk in ContentType.objects.values_list('pk', flat=True)[:6]:
+        ContentType.objects.filter(pk=pk).exists()
+    return HttpResponse('done')
+
+
+def rendered(request):
+    return SimpleTemplateResponse(engines['django'].from_string('{{ greeting }}'), {'greeting': 'hello'})
+
+
+urlpatterns = [
+    path('admin/', admin.site.urls),
+    path('n-plus-one/', n_plus_one, name='n-plus-one'),
+    path('rendered/', rendered, name='rendered'),
+    path('profiling/', include('profiling.urls')),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__, SECURE_SSL_REDIRECT=False, PROFILING_N_PLUS_ONE_THRESHOLD=5)
+@modify_settings(MIDDLEWARE={'prepend': 'profiling.middleware.ProfilingMiddleware'})
+class ProfilingMiddlewareTestCase(TestCase):
+    def setUp(self):
+        recorder.clear()
+
+    def test_records_queries_and_repeated_fingerprints(self):
+        self.client.get('/n-plus-one/')
+        [record] = recorder.records()
+        self.assertEqual((record['view'], record['status'], record['queries'], record['size']), ('n-plus-one', 200, 7, 4))
+        self.assertEqual(record['duplicates'][0]['count'], 6)
+        self.assertGreater(record['db_ms'], 0)
+        self.assertIsNone(record['render_ms'])
+
+    def test_render_time_and_own_endpoint_is_skipped(self):
+        self.client.get('/rendered/')
+        self.client.get('/profiling/')
+        [record] = recorder.records()
+        self.assertEqual(record['view'], 'rendered')
+        self.assertGreaterEqual(record['render_ms'], 0)
+
+    @override_settings(PROFILING_CPROFILE_SAMPLE_RATE=1, PROFILING_SLOW_MS=0)
+    def test_slow_requests_keep_a_profile(self):
+        self.client.get('/n-plus-one/')
+        profile = recorder.records()[0]['profile']
+        # None when another profiler (coverage, a debugger) already owns the hook
+        if profile is not None:
+            self.assertIn('cumulative', profile)
+
+    def test_fingerprint_collapses_in_lists(self):
+        self.assertEqual(
+            fingerprint('SELECT *\n  FROM t WHERE id IN (%s, %s, %s)'),
+            fingerprint('SELECT * FROM t WHERE id IN (%s)'),
+        )
+
+    def test_dump_is_staff_only(self):
+        self.client.get('/n-plus-one/')
+        request = RequestFactory().get('/profiling/', {'limit': 1})
+        request.user = SimpleNamespace(is_active=True, is_staff=False)
+        self.assertEqual(dump(request).status_code, 302)
+
+        request.user.is_staff = True
+        data = json.loads(dump(request).content)
+        self.assertEqual(len(data['records']), 1)
+        self.assertEqual(data['views'][0]['view'], 'n-plus-one')
+        self.assertEqual(data['views'][0]['n_plus_one'], 1)
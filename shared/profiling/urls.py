@@ -0,0 +1,8 @@
+from django.urls import path
+from .views import dump
+
+app_name = 'profiling'
+
+urlpatterns = [
+    path('', dump, name='dump'),
+]
@@ -0,0 +1,19 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from .recorder import recorder
+
+
+@staff_member_required
+@require_GET
+def dump(request):
+    """Per-view aggregates and the newest `?limit` (default 100) raw records from the ring buffer."""
+    try:
+        limit = max(0, int(request.GET.get('limit', 100)))
+    except ValueError:
+        limit = 100
+    return JsonResponse({
+        'views': recorder.summary(),
+        'records': recorder.records(limit) if limit else [],
+    })
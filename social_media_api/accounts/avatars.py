@@ -0,0 +1,117 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage, storages
+from django.core.signals import setting_changed
+from django.db import close_old_connections, transaction
+from django.dispatch import receiver
+from PIL import Image, ImageOps
+
+from .authentication import token_cache
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+_storage = None
+_executor = None
+_lock = threading.Lock()
+
+
+def sizes():
+    """{name: edge in pixels}, largest first."""
+    configured = getattr(settings, 'AVATAR_SIZES', {'large': 512, 'medium': 128, 'small': 48})
+    return dict(sorted(configured.items(), key=lambda item: -item[1]))
+
+
+def get_storage():
+    """Storage for thumbnails, built from AVATAR_STORAGE (same shape as a STORAGES entry)."""
+    global _storage
+    if _storage is None:
+        config = getattr(settings, 'AVATAR_STORAGE', None)
+        _storage = storages.create_storage(config) if config else default_storage
+    return _storage
+
+
+@receiver(setting_changed)
+def _reset_storage(setting, **kwargs):
+    global _storage
+    if setting in ('AVATAR_STORAGE', 'MEDIA_ROOT', 'MEDIA_URL'):
+        _storage = None
+
+
+def thumbnail_urls(user):
+    storage = get_storage()
+    return {size: storage.url(name) for size, name in (user.profile_picture_thumbnails or {}).items()}
+
+
+def render(source):
+    """Yield (size name, JPEG bytes) for every configured size, each a centred square crop."""
+    edges = sizes()
+    with Image.open(source) as image:
+        # Lets libjpeg decode at 1/2, 1/4 or 1/8 scale instead of at full resolution
+        image.draft('RGB', (max(edges.values()),) * 2)
+        image = ImageOps.exif_transpose(image).convert('RGB')
+        for name, edge in edges.items():
+            # Sizes run largest first, so each one is cut from the previous, smaller image
+            image = ImageOps.fit(image, (edge, edge), Image.LANCZOS)
+            output = BytesIO()
+            image.save(output, 'JPEG', quality=85, optimize=True, progressive=True)
+            yield name, output.getvalue()
+
+
+def generate(user_id, original):
+    """Build thumbnails for `original` and record them, unless the user has uploaded another picture since."""
+    storage = get_storage()
+    stem = os.path.splitext(os.path.basename(original))[0]
+    with User._meta.get_field('profile_picture').storage.open(original, 'rb') as source:
+        thumbnails = {
+            name: storage.save(f'avatars/{user_id}/{stem}-{name}.jpg', ContentFile(data))
+            for name, data in render(source)
+        }
+
+    previous = User.objects.filter(pk=user_id).values_list('profile_picture_thumbnails', flat=True).first()
+    updated = User.objects.filter(pk=user_id, profile_picture=original).update(profile_picture_thumbnails=thumbnails)
+    stale = thumbnails.values() if not updated else set((previous or {}).values()) - set(thumbnails.values())
+    for name in stale:
+        storage.delete(name)
+    if updated:
+        token_cache.invalidate_user(user_id)
+    return thumbnails if updated else None
+
+
+def _run(user_id, original):
+    close_old_connections()
+    try:
+        generate(user_id, original)
+    except Exception:
+        logger.exception('Could not build thumbnails for user %s', user_id)
+    finally:
+        close_old_connections()
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(getattr(settings, 'AVATAR_WORKERS', 2), thread_name_prefix='avatars')
+        return _executor
+
+
+def schedule(user):
+    """Build thumbnails for the user's current picture once the surrounding transaction commits."""
+    user_id, original = user.pk, user.profile_picture.name
+
+    def submit():
+        if getattr(settings, 'AVATAR_ASYNC', True):
+            _get_executor().submit(_run, user_id, original)
+        else:
+            generate(user_id, original)
+
+    transaction.on_commit(submit)
@@ -0,0 +1,79 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+
+from posts import feed
+from .authentication import token_cache
+from .graph import graph
+
+User = get_user_model()
+Follow = User.followers.through
+
+
+def _lock(user):
+    # Serializes one user's follow writes so the counters below stay exact
+    list(User.objects.select_for_update().filter(pk=user.pk).values_list('pk'))
+
+
+def _invalidate_cached(user_ids):
+    # The counters move through queryset.update(), which sends no post_save, so the
+    # cached users that authenticated requests see must be dropped here
+    def invalidate():
+        for user_id in user_ids:
+            token_cache.invalidate_user(user_id)
+
+    transaction.on_commit(invalidate)
+
+
+@transaction.atomic
+def follow_users(user, user_ids):
+    """
+    Make `user` follow every existing account in `user_ids`; returns the ids newly followed.
+
+    Edges are written with one bulk_create(ignore_conflicts=True) and each side's
+    counter with one UPDATE, however many accounts are followed.
+    """
+    user_ids = set(user_ids) - {user.pk}
+    if not user_ids:
+        return []
+    _lock(user)
+    authors = User.objects.only('id', 'followers_count').in_bulk(user_ids)
+    existing = set(
+        Follow.objects.filter(to_customuser=user, from_customuser__in=authors).values_list('from_customuser_id', flat=True)
+    )
+    followed = sorted(set(authors) - existing)
+    if not followed:
+        return []
+
+    Follow.objects.bulk_create(
+        [Follow(from_customuser_id=author_id, to_customuser_id=user.pk) for author_id in followed],
+        ignore_conflicts=True,
+    )
+    User.objects.filter(pk__in=followed).update(followers_count=F('followers_count') + 1)
+    User.objects.filter(pk=user.pk).update(following_count=F('following_count') + len(followed))
+    for author_id in followed:
+        feed.engine.follow(user, authors[author_id])
+    graph.follow(user.pk, followed)
+    _invalidate_cached([user.pk, *followed])
+    return followed
+
+
+@transaction.atomic
+def unfollow_users(user, user_ids):
+    """Make `user` unfollow `user_ids` with a single DELETE; returns the ids actually unfollowed."""
+    user_ids = set(user_ids)
+    if not user_ids:
+        return []
+    _lock(user)
+    edges = Follow.objects.filter(to_customuser=user, from_customuser__in=user_ids)
+    unfollowed = sorted(edges.values_list('from_customuser_id', flat=True))
+    if not unfollowed:
+        return []
+
+    edges.delete()
+    User.objects.filter(pk__in=unfollowed).update(followers_count=F('followers_count') - 1)
+    User.objects.filter(pk=user.pk).update(following_count=F('following_count') - len(unfollowed))
+    feed.engine.unfollow_many(user, unfollowed)
+    graph.unfollow(user.pk, unfollowed)
+    _invalidate_cached([user.pk, *unfollowed])
+    return unfollowed
@@ -0,0 +1,183 @@
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+User = get_user_model()
+Follow = User.followers.through
+
+_EMPTY = array('q')
+
+
+def _insert(ids, value):
+    index = bisect_left(ids, value)
+    if index == len(ids) or ids[index] != value:
+        ids.insert(index, value)
+
+
+def _remove(ids, value):
+    index = bisect_left(ids, value)
+    if index < len(ids) and ids[index] == value:
+        del ids[index]
+
+
+def _intersect(first, second):
+    if len(first) > len(second):
+        first, second = second, first
+    return sorted(set(first).intersection(second))
+
+
+class FollowGraph:
+    """
+    In-memory copy of the follow graph for set queries (mutuals, suggestions,
+    shared followers) that would otherwise be self-joins on the through table.
+
+    Each user maps to a sorted array('q') of ids in both directions, 8 bytes
+    per edge. The graph loads lazily from the through table. Follows made in
+    this process are applied when their transaction commits; edges written by
+    other processes are pulled by through-table id every
+    FOLLOW_GRAPH_SYNC_INTERVAL seconds, and unfollows made elsewhere are
+    picked up by a full reload every FOLLOW_GRAPH_REBUILD_INTERVAL seconds.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.reset()
+
+    @property
+    def sync_interval(self):
+        return getattr(settings, 'FOLLOW_GRAPH_SYNC_INTERVAL', 30)
+
+    @property
+    def rebuild_interval(self):
+        return getattr(settings, 'FOLLOW_GRAPH_REBUILD_INTERVAL', 3600)
+
+    def reset(self):
+        """Forget everything; the next query reloads from the database."""
+        with self._lock:
+            self._following = defaultdict(lambda: array('q'))
+            self._followers = defaultdict(lambda: array('q'))
+            self._high_water = 0
+            self._loaded_at = None
+            self._synced_at = None
+
+    # Loading
+    def _rows(self, after=0):
+        return (
+            Follow.objects.filter(id__gt=after)
+            .order_by('id')
+            .values_list('id', 'to_customuser_id', 'from_customuser_id')
+            .iterator(chunk_size=10000)
+        )
+
+    def _load(self):
+        following, followers = defaultdict(lambda: array('q')), defaultdict(lambda: array('q'))
+        high_water = 0
+        for edge_id, follower_id, followee_id in self._rows():
+            following[follower_id].append(followee_id)
+            followers[followee_id].append(follower_id)
+            high_water = edge_id
+        for adjacency in (following, followers):
+            for user_id, ids in adjacency.items():
+                adjacency[user_id] = array('q', sorted(ids))
+        self._following, self._followers, self._high_water = following, followers, high_water
+        self._loaded_at = self._synced_at = time.monotonic()
+
+    def _sync(self):
+        for edge_id, follower_id, followee_id in self._rows(after=self._high_water):
+            self._add(follower_id, followee_id)
+            self._high_water = edge_id
+        self._synced_at = time.monotonic()
+
+    def _ensure_current(self):
+        now = time.monotonic()
+        if self._loaded_at is None or now - self._loaded_at >= self.rebuild_interval:
+            self._load()
+        elif now - self._synced_at >= self.sync_interval:
+            self._sync()
+
+    # Writes
+    def _add(self, follower_id, followee_id):
+        _insert(self._following[follower_id], followee_id)
+        _insert(self._followers[followee_id], follower_id)
+
+    def _discard(self, follower_id, followee_id):
+        _remove(self._following.get(follower_id, _EMPTY), followee_id)
+        _remove(self._followers.get(followee_id, _EMPTY), follower_id)
+
+    def apply(self, added=(), removed=()):
+        """Apply committed (follower_id, followee_id) edges; a no-op until the graph is loaded."""
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            for follower_id, followee_id in added:
+                self._add(follower_id, followee_id)
+            for follower_id, followee_id in removed:
+                self._discard(follower_id, followee_id)
+
+    def follow(self, follower_id, followee_ids):
+        edges = [(follower_id, followee_id) for followee_id in followee_ids]
+        transaction.on_commit(lambda: self.apply(added=edges))
+
+    def unfollow(self, follower_id, followee_ids):
+        edges = [(follower_id, followee_id) for followee_id in followee_ids]
+        transaction.on_commit(lambda: self.apply(removed=edges))
+
+    # Queries; all return user ids
+    def following(self, user_id):
+        with self._lock:
+            self._ensure_current()
+            return list(self._following.get(user_id, _EMPTY))
+
+    def followers(self, user_id):
+        with self._lock:
+            self._ensure_current()
+            return list(self._followers.get(user_id, _EMPTY))
+
+    def mutuals(self, user_id):
+        """Users who follow `user_id` and are followed back."""
+        with self._lock:
+            self._ensure_current()
+            return _intersect(self._following.get(user_id, _EMPTY), self._followers.get(user_id, _EMPTY))
+
+    def common_followers(self, *user_ids):
+        """Users following every one of `user_ids`."""
+        with self._lock:
+            self._ensure_current()
+            common = None
+            for user_id in user_ids:
+                ids = self._followers.get(user_id, _EMPTY)
+                common = set(ids) if common is None else common.intersection(ids)
+                if not common:
+                    return []
+            return sorted(common or ())
+
+    def followed_by_following(self, user_id, target_id):
+        """People `user_id` follows who also follow `target_id`."""
+        with self._lock:
+            self._ensure_current()
+            return _intersect(self._following.get(user_id, _EMPTY), self._followers.get(target_id, _EMPTY))
+
+    def suggestions(self, user_id, limit=10):
+        """
+        Accounts followed by the people `user_id` follows, as [(user_id, count)]
+        ordered by how many of them follow it.
+        """
+        with self._lock:
+            self._ensure_current()
+            following = self._following.get(user_id, _EMPTY)
+            counts = Counter()
+            for followee_id in following:
+                counts.update(self._following.get(followee_id, _EMPTY))
+            excluded = set(following)
+            excluded.add(user_id)
+            ranked = (item for item in counts.items() if item[0] not in excluded)
+            return sorted(ranked, key=lambda item: (-item[1], item[0]))[:limit]
+
+
+graph = FollowGraph()
@@ -0,0 +1,20 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    The auto-created through table only has the (from, to) unique index, which
+    serves follower lists. Following lists filter on to_customuser_id, so give
+    them the mirrored index; it also keeps their keyset pages ordered by id.
+    """
+
+    dependencies = [
+        ('accounts', '0002_counters'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX follow_reverse_idx ON accounts_customuser_followers (to_customuser_id, from_customuser_id)',
+            reverse_sql='DROP INDEX follow_reverse_idx',
+        ),
+    ]
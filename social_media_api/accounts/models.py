@@ -4,7 +4,13 @@ from django.db import models
 class CustomUser(AbstractUser):
     bio = models.TextField(blank=True)
     profile_picture = models.ImageField(upload_to='profiles/', blank=True, null=True)
+    # {size name: storage name}, filled in by accounts.avatars once the thumbnails exist
+    profile_picture_thumbnails = models.JSONField(default=dict, blank=True)
     followers = models.ManyToManyField('self', symmetrical=False, related_name='following', blank=True)
 
+    # Denormalized counters, kept in step by the follow views (see posts reconcile_counters)
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+
     def __str__(self):
         return self.username
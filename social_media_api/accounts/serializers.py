@@ -2,6 +2,8 @@ from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from rest_framework.authtoken.models import Token
 
+from . import avatars
+
 User = get_user_model()
 
 class RegisterSerializer(serializers.ModelSerializer):
@@ -27,11 +29,29 @@ class LoginSerializer(serializers.Serializer):
 
 
 class UserProfileSerializer(serializers.ModelSerializer):
-    followers_count = serializers.SerializerMethodField()
+    profile_picture_urls = serializers.SerializerMethodField()
 
     class Meta:
         model = User
-        fields = ['id', 'username', 'bio', 'profile_picture', 'followers_count']
+        fields = [
+            'id', 'username', 'bio', 'profile_picture', 'profile_picture_urls', 'followers_count', 'following_count',
+        ]
+        read_only_fields = ['followers_count', 'following_count']
+
+    def get_profile_picture_urls(self, user):
+        return avatars.thumbnail_urls(user)
+
+
+class UserSummarySerializer(serializers.ModelSerializer):
+    avatar = serializers.SerializerMethodField()
+
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'avatar']
+
+    def get_avatar(self, user):
+        return avatars.thumbnail_urls(user).get('small')
+
 
-    def get_followers_count(self, obj):
-        return obj.followers.count()
+class BulkFollowSerializer(serializers.Serializer):
+    user_ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=100)
@@ -0,0 +1,40 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import token_cache
+from .graph import graph
+
+User = get_user_model()
+
+
+@receiver(post_delete, sender=Token)
+def forget_token(sender, instance, **kwargs):
+    token_cache.invalidate(instance.key)
+
+
+# Any save may change the password or is_active, and the cached user is also
+# what the profile endpoint serializes, so drop it on every write
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_user_tokens(sender, instance, **kwargs):
+    token_cache.invalidate_user(instance.pk)
+
+
+# Keeps the in-memory follow graph in step with user.followers/user.following
+# add() and remove(); the follow views write the through table and call it directly
+@receiver(m2m_changed, sender=User.followers.through)
+def sync_follow_graph(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'post_clear':
+        transaction.on_commit(graph.reset)
+        return
+    if action not in ('post_add', 'post_remove'):
+        return
+    # followers.add(f) makes f follow the instance; following.add(f) the other way round
+    edges = [(instance.pk, pk) if reverse else (pk, instance.pk) for pk in pk_set]
+    if action == 'post_add':
+        transaction.on_commit(lambda: graph.apply(added=edges))
+    else:
+        transaction.on_commit(lambda: graph.apply(removed=edges))
@@ -1,3 +1,240 @@
-from django.test import TestCase
+import tempfile
+from io import BytesIO
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+from PIL import Image
+
+from . import avatars, follows
+from .authentication import TokenCache, token_cache
+from .graph import Follow, graph
+
+User = get_user_model()
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class TokenCacheTestCase(APITestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create_user(username='user')
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def profile(self):
+        return self.client.get('/api/accounts/profile/')
+
+    def test_repeat_requests_skip_the_auth_query(self):
+        self.assertEqual(self.profile().status_code, status.HTTP_200_OK)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.profile().data['username'], 'user')
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(token_cache.stats()['hit_rate'], 0.5)
+
+    def test_deleted_token_is_rejected(self):
+        self.profile()
+        self.token.delete()
+        self.assertEqual(self.profile().status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivation_and_password_change_invalidate(self):
+        self.profile()
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.profile().status_code, status.HTTP_401_UNAUTHORIZED)
+
+        User.objects.filter(pk=self.user.pk).update(is_active=True)
+        self.profile()
+        self.user.set_password('changed')
+        self.user.save(update_fields=['password'])
+        self.assertEqual(token_cache.stats()['size'], 0)
+
+    def test_follows_refresh_cached_counters(self):
+        author = User.objects.create_user(username='author')
+        Token.objects.create(user=author)
+        self.profile()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/accounts/follow/{author.id}/')
+        self.assertEqual(self.profile().data['following_count'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/accounts/unfollow/{author.id}/')
+        self.assertEqual(self.profile().data['following_count'], 0)
+
+    def test_lru_and_ttl(self):
+        cache = TokenCache(max_size=2, timeout=60)
+        for key in 'abc':
+            cache.set(key, self.user, self.token)
+        self.assertIsNone(cache.get('a'))
+        self.assertIsNotNone(cache.get('b'))
+
+        cache = TokenCache(max_size=2, timeout=0)
+        cache.set('a', self.user, self.token)
+        self.assertIsNone(cache.get('a'))
+
+    def test_stats_are_admin_only(self):
+        self.assertEqual(self.client.get('/api/accounts/auth-cache/').status_code, status.HTTP_403_FORBIDDEN)
+        User.objects.filter(pk=self.user.pk).update(is_staff=True)
+        token_cache.invalidate_user(self.user.pk)
+        self.assertIn('hit_rate', self.client.get('/api/accounts/auth-cache/').data)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class FollowGraphTestCase(APITestCase):
+    def setUp(self):
+        graph.reset()
+        self.me, self.friend, self.idol, self.fan, self.stranger = (
+            User.objects.create_user(username=name) for name in ('me', 'friend', 'idol', 'fan', 'stranger')
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.me.following.add(self.friend, self.idol)
+            self.friend.following.add(self.me, self.idol, self.stranger)
+            self.fan.following.add(self.me, self.idol)
+        self.client.force_authenticate(self.me)
+
+    def ids(self, response):
+        return [user['id'] for user in response.data]
+
+    def test_queries(self):
+        self.assertEqual(self.ids(self.client.get('/api/accounts/mutuals/')), [self.friend.id])
+        self.assertEqual(
+            self.ids(self.client.get(f'/api/accounts/common-followers/{self.idol.id}/')),
+            [self.friend.id, self.fan.id],
+        )
+        self.assertEqual(
+            self.ids(self.client.get(f'/api/accounts/followed-by-following/{self.stranger.id}/')),
+            [self.friend.id],
+        )
+        response = self.client.get('/api/accounts/suggestions/')
+        self.assertEqual(
+            response.data, [{'id': self.stranger.id, 'username': 'stranger', 'avatar': None, 'followed_by': 1}],
+        )
+
+    def test_follow_views_update_the_graph_in_place(self):
+        self.assertEqual(graph.followers(self.stranger.id), [self.friend.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/accounts/follow/{self.stranger.id}/')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(graph.following(self.me.id), [self.friend.id, self.idol.id, self.stranger.id])
+            self.assertEqual(graph.suggestions(self.me.id), [])
+        self.assertEqual(len(queries), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/accounts/unfollow/{self.stranger.id}/')
+        self.assertEqual(graph.followers(self.stranger.id), [self.friend.id])
+
+    @override_settings(FOLLOW_GRAPH_SYNC_INTERVAL=0)
+    def test_pulls_follows_written_elsewhere(self):
+        graph.following(self.stranger.id)
+        Follow.objects.create(from_customuser=self.fan, to_customuser=self.stranger)
+        self.assertEqual(graph.following(self.stranger.id), [self.fan.id])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class BulkFollowTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='user')
+        self.others = [User.objects.create_user(username=f'other{n}') for n in range(5)]
+        self.client.force_authenticate(self.user)
+
+    def counts(self):
+        return dict(User.objects.values_list('username', 'followers_count')), User.objects.get(pk=self.user.pk).following_count
+
+    def test_bulk_follow_and_unfollow(self):
+        ids = [other.id for other in self.others]
+        self.client.post(f'/api/accounts/follow/{ids[0]}/')
+        response = self.client.post('/api/accounts/follow/', {'user_ids': ids + [self.user.id, 999]}, format='json')
+        self.assertEqual(response.data, {'followed': ids[1:]})
+        followers, following = self.counts()
+        self.assertEqual((followers['other4'], followers['user'], following), (1, 0, 5))
+
+        response = self.client.post('/api/accounts/unfollow/', {'user_ids': ids[:3]}, format='json')
+        self.assertEqual(response.data, {'unfollowed': ids[:3]})
+        followers, following = self.counts()
+        self.assertEqual((followers['other0'], followers['other4'], following), (0, 1, 2))
+
+        self.assertEqual(self.client.post('/api/accounts/follow/', {'user_ids': []}, format='json').status_code, 400)
+        self.assertEqual(self.client.post('/api/accounts/follow/999/').status_code, 404)
+        self.assertEqual(self.client.post(f'/api/accounts/follow/{self.user.id}/').status_code, 400)
+
+    def test_editing_the_profile_keeps_concurrent_counts(self):
+        # self.user, the authenticated copy, was loaded before this follow
+        follows.follow_users(self.others[0], [self.user.id])
+        response = self.client.patch('/api/accounts/profile/', {'bio': 'Edited'})
+        self.assertEqual(response.data['bio'], 'Edited')
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.bio, self.user.followers_count), ('Edited', 1))
+
+    def test_follow_lists_are_cursor_paged(self):
+        self.client.post('/api/accounts/follow/', {'user_ids': [other.id for other in self.others]}, format='json')
+        self.others[0].following.add(self.user)
+
+        response = self.client.get(f'/api/accounts/users/{self.user.id}/following/', {'page_size': 3})
+        self.assertEqual([user['username'] for user in response.data['results']], ['other0', 'other1', 'other2'])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([user['username'] for user in response.data['results']], ['other3', 'other4'])
+        self.assertIsNone(response.data['next'])
+
+        response = self.client.get(f'/api/accounts/users/{self.user.id}/followers/')
+        self.assertEqual(response.data['results'], [{'id': self.others[0].id, 'username': 'other0', 'avatar': None}])
+        self.assertEqual(self.client.get('/api/accounts/users/999/followers/').status_code, 404)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, AVATAR_ASYNC=False, AVATAR_SIZES={'medium': 128, 'small': 48})
+class AvatarTestCase(APITestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        self.user = User.objects.create_user(username='user')
+        self.client.force_authenticate(self.user)
+
+    def upload(self, size=(1600, 1200)):
+        buffer = BytesIO()
+        Image.new('RGB', size, 'teal').save(buffer, 'JPEG')
+        picture = SimpleUploadedFile('me.jpg', buffer.getvalue(), content_type='image/jpeg')
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.patch('/api/accounts/profile/', {'profile_picture': picture}, format='multipart')
+
+    def test_upload_builds_thumbnails(self):
+        self.assertEqual(self.upload().status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        storage = avatars.get_storage()
+        for name, edge in [('medium', 128), ('small', 48)]:
+            with Image.open(storage.open(self.user.profile_picture_thumbnails[name])) as image:
+                self.assertEqual(image.size, (edge, edge))
+
+        urls = self.client.get('/api/accounts/profile/').data['profile_picture_urls']
+        self.assertEqual(set(urls), {'medium', 'small'})
+        self.assertTrue(urls['small'].endswith('-small.jpg'))
+
+        fan = User.objects.create_user(username='fan')
+        self.client.force_authenticate(fan)
+        self.client.post(f'/api/accounts/follow/{self.user.id}/')
+        following = self.client.get(f'/api/accounts/users/{fan.id}/following/').data['results']
+        self.assertEqual(following[0]['avatar'], urls['small'])
+
+    def test_replaced_picture_discards_stale_thumbnails(self):
+        self.upload()
+        self.user.refresh_from_db()
+        first = dict(self.user.profile_picture_thumbnails)
+        original = self.user.profile_picture.name
+        self.upload(size=(300, 300))
+
+        # A job for the old picture finishing late must not overwrite the new thumbnails
+        self.assertIsNone(avatars.generate(self.user.id, original))
+        self.user.refresh_from_db()
+        storage = avatars.get_storage()
+        self.assertNotEqual(self.user.profile_picture_thumbnails, first)
+        self.assertFalse(any(storage.exists(name) for name in first.values()))
+
+    def test_profile_edits_keep_thumbnails_built_since_loading(self):
+        # The worker records thumbnails with an update(), so self.user, the authenticated copy, never sees them
+        self.upload()
+        self.client.patch('/api/accounts/profile/', {'bio': 'Edited'})
+        self.user.refresh_from_db()
+        self.assertEqual(set(self.user.profile_picture_thumbnails), {'medium', 'small'})
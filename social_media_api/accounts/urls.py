@@ -1,5 +1,8 @@
 from django.urls import path
-from .views import RegisterView, LoginView, ProfileView, FollowUserView, UnfollowUserView
+from .views import (
+    RegisterView, LoginView, ProfileView, FollowUserView, UnfollowUserView, AuthCacheStatsView,
+    BulkFollowView, FollowListView, MutualsView, CommonFollowersView, FollowedByFollowingView, SuggestionsView,
+)
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
@@ -8,4 +11,15 @@ urlpatterns = [
 
     path('follow/<int:user_id>/', FollowUserView.as_view()),
     path('unfollow/<int:user_id>/', UnfollowUserView.as_view()),
+    path('follow/', BulkFollowView.as_view(mode='follow')),
+    path('unfollow/', BulkFollowView.as_view(mode='unfollow')),
+    path('users/<int:user_id>/followers/', FollowListView.as_view(relation='followers')),
+    path('users/<int:user_id>/following/', FollowListView.as_view(relation='following')),
+
+    path('mutuals/', MutualsView.as_view()),
+    path('suggestions/', SuggestionsView.as_view()),
+    path('common-followers/<int:user_id>/', CommonFollowersView.as_view()),
+    path('followed-by-following/<int:user_id>/', FollowedByFollowingView.as_view()),
+
+    path('auth-cache/', AuthCacheStatsView.as_view()),
 ]
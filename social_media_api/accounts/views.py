@@ -4,13 +4,20 @@ from django.contrib.auth import authenticate
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model
 from django.shortcuts import get_object_or_404
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.views import APIView
+from rest_framework.exceptions import NotFound
 
+from .authentication import token_cache
+from . import avatars, follows
+from .graph import graph
 from .models import CustomUser
-from .serializers import RegisterSerializer, LoginSerializer, UserProfileSerializer
+from .serializers import (
+    RegisterSerializer, LoginSerializer, UserProfileSerializer, UserSummarySerializer, BulkFollowSerializer,
+)
 
 User = get_user_model()
+Follow = User.followers.through
 
 class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
@@ -56,14 +63,28 @@ class ProfileView(generics.RetrieveUpdateAPIView):
     def get_object(self):
         return self.request.user
 
+    def perform_update(self, serializer):
+        # Save only the edited columns: request.user may come from the token cache, and a
+        # full save would write back its followers_count, following_count and
+        # profile_picture_thumbnails as loaded, restoring names the avatars worker has deleted
+        user = serializer.instance
+        for field, value in serializer.validated_data.items():
+            setattr(user, field, value)
+        user.save(update_fields=[*serializer.validated_data])
+        # The upload itself is stored here; resizing happens in the avatars worker pool
+        if 'profile_picture' in serializer.validated_data and user.profile_picture:
+            avatars.schedule(user)
+
 
 class FollowUserView(generics.GenericAPIView):
     permission_classes = [permissions.IsAuthenticated]
     queryset = CustomUser.objects.all()
 
     def post(self, request, user_id):
-        user_to_follow = self.get_queryset().get(id=user_id)
-        request.user.following.add(user_to_follow)
+        if user_id == request.user.pk:
+            return Response({'detail': 'You cannot follow yourself'}, status=status.HTTP_400_BAD_REQUEST)
+        if not follows.follow_users(request.user, [user_id]) and not self.get_queryset().filter(pk=user_id).exists():
+            raise NotFound()
         return Response(
             {'detail': 'User followed successfully'},
             status=status.HTTP_200_OK
@@ -75,9 +96,120 @@ class UnfollowUserView(generics.GenericAPIView):
     queryset = CustomUser.objects.all()
 
     def post(self, request, user_id):
-        user_to_unfollow = self.get_queryset().get(id=user_id)
-        request.user.following.remove(user_to_unfollow)
+        if not follows.unfollow_users(request.user, [user_id]) and not self.get_queryset().filter(pk=user_id).exists():
+            raise NotFound()
         return Response(
             {'detail': 'User unfollowed successfully'},
             status=status.HTTP_200_OK
-        )
\ No newline at end of file
+        )
+
+
+class BulkFollowView(APIView):
+    """Follow (or, with `mode = 'unfollow'`, unfollow) up to 100 accounts in one request."""
+    permission_classes = [IsAuthenticated]
+    serializer_class = BulkFollowSerializer
+    mode = 'follow'
+
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user_ids = serializer.validated_data['user_ids']
+        if self.mode == 'follow':
+            return Response({'followed': follows.follow_users(request.user, user_ids)})
+        return Response({'unfollowed': follows.unfollow_users(request.user, user_ids)})
+
+
+class FollowListView(generics.ListAPIView):
+    """
+    Followers (or, with `relation = 'following'`, accounts followed) of a user, by user id.
+
+    Pages over the through table itself so each page is a seek on the (from, to)
+    unique index or the mirrored (to, from) one, already in keyset order.
+    """
+    serializer_class = UserSummarySerializer
+    permission_classes = [IsAuthenticated]
+    relation = 'followers'
+
+    @property
+    def columns(self):
+        # followers of X are the `to` side of rows whose `from` is X, and vice versa
+        if self.relation == 'followers':
+            return 'from_customuser', 'to_customuser'
+        return 'to_customuser', 'from_customuser'
+
+    @property
+    def keyset_fields(self):
+        return (f'{self.columns[1]}_id',)
+
+    def get_queryset(self):
+        owner, listed = self.columns
+        user = get_object_or_404(User.objects.only('id'), pk=self.kwargs['user_id'])
+        return (
+            Follow.objects.filter(**{owner: user})
+            .select_related(listed)
+            .only(f'{listed}__id', f'{listed}__username', f'{listed}__profile_picture_thumbnails')
+            .order_by(f'{listed}_id')
+        )
+
+    def list(self, request, *args, **kwargs):
+        edges = self.paginate_queryset(self.get_queryset())
+        users = [getattr(edge, self.columns[1]) for edge in edges]
+        return self.get_paginated_response(self.get_serializer(users, many=True).data)
+
+
+def _summaries(user_ids):
+    """Serialize users in the order of `user_ids` with one query."""
+    users = User.objects.only('id', 'username', 'profile_picture_thumbnails').in_bulk(user_ids)
+    return UserSummarySerializer([users[pk] for pk in user_ids if pk in users], many=True).data
+
+
+class GraphQueryView(APIView):
+    """Follow-graph lookups answered from accounts.graph; `?limit=` caps the result (max 100)."""
+    permission_classes = [IsAuthenticated]
+    default_limit = 20
+    max_limit = 100
+
+    def get_limit(self):
+        try:
+            limit = int(self.request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            limit = self.default_limit
+        return max(1, min(limit, self.max_limit))
+
+
+class MutualsView(GraphQueryView):
+    def get(self, request):
+        return Response(_summaries(graph.mutuals(request.user.pk)[:self.get_limit()]))
+
+
+class CommonFollowersView(GraphQueryView):
+    """Followers shared by the current user and `user_id`."""
+
+    def get(self, request, user_id):
+        get_object_or_404(User, pk=user_id)
+        return Response(_summaries(graph.common_followers(request.user.pk, user_id)[:self.get_limit()]))
+
+
+class FollowedByFollowingView(GraphQueryView):
+    """People the current user follows who follow `user_id`."""
+
+    def get(self, request, user_id):
+        get_object_or_404(User, pk=user_id)
+        return Response(_summaries(graph.followed_by_following(request.user.pk, user_id)[:self.get_limit()]))
+
+
+class SuggestionsView(GraphQueryView):
+    """Accounts followed by the people the current user follows."""
+    default_limit = 10
+
+    def get(self, request):
+        counts = dict(graph.suggestions(request.user.pk, limit=self.get_limit()))
+        return Response([dict(user, followed_by=counts[user['id']]) for user in _summaries(list(counts))])
+
+
+class AuthCacheStatsView(APIView):
+    """Hit rate of the token cache in the process serving the request."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(token_cache.stats())
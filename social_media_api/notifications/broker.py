@@ -0,0 +1,171 @@
+import asyncio
+import itertools
+import threading
+import time
+import uuid
+from collections import OrderedDict, defaultdict, deque
+
+from django.conf import settings
+
+
+class Subscription:
+    """One connected client. Events are handed over to its event loop thread-safely."""
+
+    def __init__(self, broker, user_id, loop, max_pending):
+        self.broker = broker
+        self.user_id = user_id
+        self.loop = loop
+        self.max_pending = max_pending
+        self.pending = deque()
+        self.ready = asyncio.Event()
+        self.overflowed = False
+        # Id for a `resync` event: the client has reloaded everything up to here
+        self.resync_id = f'{broker.epoch}-0'
+
+    def deliver(self, event):
+        self.loop.call_soon_threadsafe(self._push, event)
+
+    def _push(self, event):
+        if len(self.pending) >= self.max_pending:
+            # Too slow to keep up: drop the backlog and make the client resync
+            self.pending.clear()
+            self.overflowed = True
+            self.resync_id = f'{self.broker.epoch}-{event[0] - 1}'
+        else:
+            self.pending.append(event)
+        self.ready.set()
+
+    async def next_events(self, timeout):
+        """Wait up to `timeout` seconds and return the events received meanwhile."""
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        self.ready.clear()
+        events = list(self.pending)
+        self.pending.clear()
+        return events
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class Broker:
+    """
+    In-process pub/sub for notification events, one channel per recipient.
+
+    Every event gets an id of the form `<epoch>-<sequence>`. The last `backlog`
+    events of each user are kept so a reconnecting client that sends Last-Event-ID
+    gets what it missed. If the id is older than the backlog, or comes from
+    another process lifetime (different epoch), `subscribe` reports a gap and the
+    client should reload from the REST endpoint.
+
+    A user's backlog is dropped once they have had no subscriber and no activity
+    for `retention` seconds, so memory follows recently active users rather than
+    everyone ever notified. A client away for longer than that resyncs.
+
+    Only clients connected to the same process receive events; run a single
+    ASGI worker, or put a shared broker in front, when scaling out.
+    """
+
+    def __init__(self, backlog=100, retention=600):
+        self.epoch = uuid.uuid4().hex[:8]
+        self.backlog_size = backlog
+        self.retention = retention
+        self._sequence = itertools.count(1)
+        self._last = 0
+        self._lock = threading.Lock()
+        self._backlog = {}
+        # Sequences below which a user's events may have been dropped from the backlog
+        self._evicted = {}
+        self._floor = {}
+        # Newest sequence dropped by pruning, across all users
+        self._pruned = 0
+        # user_id -> time of last activity, least recent first
+        self._touched = OrderedDict()
+        self._subscribers = defaultdict(set)
+
+    def _touch(self, user_id, now):
+        self._touched[user_id] = now
+        self._touched.move_to_end(user_id)
+
+    def _prune(self, now):
+        while self._touched:
+            user_id, touched = next(iter(self._touched.items()))
+            if now - touched < self.retention:
+                break
+            if user_id in self._subscribers:
+                self._touch(user_id, now)
+                continue
+            del self._touched[user_id]
+            backlog = self._backlog.pop(user_id, None)
+            if backlog:
+                self._pruned = max(self._pruned, backlog[-1][0])
+            self._evicted.pop(user_id, None)
+            self._floor.pop(user_id, None)
+
+    def publish(self, user_id, data):
+        now = time.monotonic()
+        with self._lock:
+            self._prune(now)
+            sequence = self._last = next(self._sequence)
+            backlog = self._backlog.get(user_id)
+            if backlog is None:
+                backlog = self._backlog[user_id] = deque(maxlen=self.backlog_size)
+                # This user's earlier events may have been pruned
+                self._floor[user_id] = self._pruned
+            elif len(backlog) == backlog.maxlen:
+                self._evicted[user_id] = backlog[0][0]
+            event = (sequence, f'{self.epoch}-{sequence}', data)
+            backlog.append(event)
+            self._touch(user_id, now)
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscription in subscribers:
+            subscription.deliver(event)
+        return event[1]
+
+    def subscribe(self, user_id, last_event_id=None, loop=None, max_pending=1000):
+        """
+        Register a subscriber and return (subscription, missed_events, gap).
+
+        `missed_events` are the backlog entries after `last_event_id`; `gap` is True
+        when events may have been lost and the client should resync.
+        """
+        subscription = Subscription(self, user_id, loop or asyncio.get_running_loop(), max_pending)
+        now = time.monotonic()
+        with self._lock:
+            self._prune(now)
+            self._subscribers[user_id].add(subscription)
+            self._touch(user_id, now)
+            subscription.resync_id = f'{self.epoch}-{self._last}'
+            backlog = list(self._backlog.get(user_id, ()))
+            evicted = self._evicted.get(user_id, 0)
+            floor = self._floor.get(user_id, self._pruned)
+
+        if not last_event_id:
+            return subscription, [], False
+        epoch, _, sequence = last_event_id.partition('-')
+        if epoch != self.epoch or not sequence.isdigit():
+            return subscription, [], True
+        sequence = int(sequence)
+        missed = [event for event in backlog if event[0] > sequence]
+        return subscription, missed, sequence < max(evicted, floor)
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+                    # The backlog is kept for `retention` seconds after the last client leaves
+                    self._touch(subscription.user_id, time.monotonic())
+
+    def subscriber_count(self, user_id=None):
+        with self._lock:
+            if user_id is not None:
+                return len(self._subscribers.get(user_id, ()))
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+broker = Broker(retention=getattr(settings, 'NOTIFICATION_BACKLOG_RETENTION', 600))
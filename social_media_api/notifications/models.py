@@ -15,8 +15,25 @@ class Notification(models.Model):
     target_object_id = models.PositiveIntegerField(null=True, blank=True)
     target = GenericForeignKey('target_content_type', 'target_object_id')
 
+    # Number of actors folded into this row by the pipeline ("N people liked your post")
+    actor_count = models.PositiveIntegerField(default=1)
+
     is_read = models.BooleanField(default=False)
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['recipient', '-timestamp', '-id'], name='notification_recent_idx'),
+            models.Index(fields=['recipient', 'is_read', '-timestamp'], name='notification_read_state_idx'),
+            # Only unread rows: keeps badge counts and mark-as-read updates small
+            models.Index(
+                fields=['recipient', '-timestamp', '-id'],
+                condition=models.Q(is_read=False),
+                name='notification_unread_idx',
+            ),
+        ]
+
     def __str__(self):
+        if self.actor_count > 1:
+            return f"{self.actor} and {self.actor_count - 1} others {self.verb}"
         return f"{self.actor} {self.verb}"
@@ -0,0 +1,167 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .broker import broker
+from .models import Notification
+from .serializers import NotificationSerializer
+from . import unread
+
+logger = logging.getLogger(__name__)
+
+Event = namedtuple('Event', ['recipient_id', 'actor_id', 'verb', 'target_content_type_id', 'target_object_id'])
+
+
+def _key(item):
+    return (item.recipient_id, item.verb, item.target_content_type_id, item.target_object_id)
+
+
+class NotificationPipeline:
+    """
+    Buffer notifications in memory and write them in batches.
+
+    Producers call `notify()`, which only enqueues an event once the surrounding
+    transaction commits. A background worker drains the queue, folds events for the
+    same (recipient, verb, target) into one row, adds them to a matching unread row
+    written within NOTIFICATION_COALESCE_WINDOW seconds, and inserts the rest
+    with a single bulk_create.
+
+    With NOTIFICATION_ASYNC = False every event is written as soon as it is queued,
+    which is what the tests use.
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_async(self):
+        return getattr(settings, 'NOTIFICATION_ASYNC', True)
+
+    @property
+    def batch_size(self):
+        return getattr(settings, 'NOTIFICATION_BATCH_SIZE', 500)
+
+    @property
+    def flush_interval(self):
+        return getattr(settings, 'NOTIFICATION_FLUSH_INTERVAL', 0.5)
+
+    @property
+    def coalesce_window(self):
+        return timedelta(seconds=getattr(settings, 'NOTIFICATION_COALESCE_WINDOW', 3600))
+
+    # Producer side
+    def notify(self, recipient, actor, verb, target=None):
+        event = Event(
+            recipient_id=recipient.pk,
+            actor_id=actor.pk,
+            verb=verb,
+            target_content_type_id=ContentType.objects.get_for_model(target).pk if target is not None else None,
+            target_object_id=target.pk if target is not None else None,
+        )
+        transaction.on_commit(lambda: self.enqueue(event))
+
+    def enqueue(self, event):
+        self.queue.put(event)
+        if self.is_async:
+            self._ensure_worker()
+        else:
+            self.flush()
+
+    # Consumer side
+    def flush(self):
+        """Write everything currently queued; returns the number of events written."""
+        events = []
+        while True:
+            try:
+                events.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        if events:
+            self.write(events)
+        return len(events)
+
+    def write(self, events):
+        groups = {}
+        for event in events:
+            groups.setdefault(_key(event), []).append(event)
+
+        since = timezone.now() - self.coalesce_window
+        candidates = Notification.objects.filter(
+            recipient_id__in={key[0] for key in groups},
+            verb__in={key[1] for key in groups},
+            is_read=False,
+            timestamp__gte=since,
+        ).order_by('timestamp', 'id')
+        existing = {_key(notification): notification for notification in candidates}
+
+        now = timezone.now()
+        updated, created = [], []
+        for key, grouped in groups.items():
+            latest = grouped[-1]
+            notification = existing.get(key)
+            if notification is not None:
+                notification.actor_id = latest.actor_id
+                notification.actor_count = F('actor_count') + len(grouped)
+                notification.timestamp = now
+                updated.append(notification)
+            else:
+                created.append(Notification(**latest._asdict(), actor_count=len(grouped)))
+
+        with transaction.atomic():
+            if updated:
+                Notification.objects.bulk_update(updated, ['actor', 'actor_count', 'timestamp'])
+            if created:
+                Notification.objects.bulk_create(created, batch_size=self.batch_size)
+                # Coalesced rows were already unread, so only new rows change the badge
+                recipients = {notification.recipient_id for notification in created}
+                transaction.on_commit(lambda: unread.invalidate(*recipients))
+            changed = [notification.pk for notification in updated + created]
+            transaction.on_commit(lambda: self.publish(changed))
+
+    def publish(self, notification_ids):
+        """Push the written rows to connected stream clients (see notifications.broker)."""
+        notifications = list(Notification.objects.filter(pk__in=notification_ids).select_related('actor'))
+        for notification, data in zip(notifications, NotificationSerializer(notifications, many=True).data):
+            broker.publish(notification.recipient_id, data)
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='notification-pipeline', daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            events = [self.queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(events) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    events.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            close_old_connections()
+            try:
+                self.write(events)
+            except Exception:
+                logger.exception('Dropped %d notifications', len(events))
+            finally:
+                close_old_connections()
+
+
+pipeline = NotificationPipeline()
+atexit.register(pipeline.flush)
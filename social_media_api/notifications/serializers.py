@@ -1,7 +1,28 @@
 from rest_framework import serializers
 from .models import Notification
+from .targets import resolve_targets
+
+
+class NotificationListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        notifications = list(data.all() if hasattr(data, 'all') else data)
+        resolve_targets(notifications)
+        return super().to_representation(notifications)
+
 
 class NotificationSerializer(serializers.ModelSerializer):
+    target = serializers.SerializerMethodField()
+
     class Meta:
         model = Notification
         fields = '__all__'
+        list_serializer_class = NotificationListSerializer
+
+    def get_target(self, obj):
+        if not hasattr(obj, 'target_summary'):
+            resolve_targets([obj])
+        return obj.target_summary
+
+
+class MarkReadSerializer(serializers.Serializer):
+    up_to = serializers.IntegerField(help_text='Mark this notification and every older one as read.')
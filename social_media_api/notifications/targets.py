@@ -0,0 +1,42 @@
+from collections import defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+
+
+# model class -> (queryset factory, summarize(obj) -> dict)
+_registry = {}
+
+
+def register(model, summarize, queryset=None):
+    """Declare how targets of `model` are fetched in bulk and summarized inline."""
+    _registry[model] = (queryset or (lambda: model._default_manager.all()), summarize)
+
+
+def _default_summary(obj):
+    return {'id': obj.pk, 'display': str(obj)}
+
+
+def resolve_targets(notifications):
+    """
+    Attach a `target_summary` to every notification with one query per target type.
+
+    Rows are grouped by target_content_type and each group is fetched with a single
+    in_bulk() call, so rendering a page costs a fixed number of queries instead of
+    one per row. Deleted targets resolve to None.
+    """
+    wanted = defaultdict(set)
+    for notification in notifications:
+        if notification.target_content_type_id is not None:
+            wanted[notification.target_content_type_id].add(notification.target_object_id)
+
+    summaries = {}
+    for content_type_id, object_ids in wanted.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        queryset, summarize = _registry.get(model, (lambda: model._default_manager.all(), _default_summary))
+        for pk, obj in queryset().in_bulk(object_ids).items():
+            summaries[(content_type_id, pk)] = {'type': model._meta.model_name, **summarize(obj)}
+
+    for notification in notifications:
+        notification.target_summary = summaries.get(
+            (notification.target_content_type_id, notification.target_object_id)
+        )
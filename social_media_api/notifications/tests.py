@@ -1,3 +1,238 @@
-from django.test import TestCase
+import asyncio
+from unittest import mock
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from posts.models import Post, Comment
+from .broker import Broker, broker
+from .models import Notification
+
+User = get_user_model()
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, NOTIFICATION_ASYNC=False)
+class NotificationPipelineTestCase(APITestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.post = Post.objects.create(author=self.author, title='Viral', content='Body')
+        self.fans = [User.objects.create_user(username=f'fan{n}') for n in range(3)]
+
+    def like(self, user, post=None):
+        self.client.force_authenticate(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/postsposts/{(post or self.post).id}/like/')
+
+    def test_likes_coalesce_into_one_notification(self):
+        for fan in self.fans:
+            self.like(fan)
+
+        notification = Notification.objects.get()
+        self.assertEqual(notification.actor_count, 3)
+        self.assertEqual(notification.actor, self.fans[-1])
+        self.assertEqual(str(notification), 'fan2 and 2 others liked your post')
+
+    def test_read_or_stale_notifications_are_not_reused(self):
+        self.like(self.fans[0])
+        Notification.objects.update(is_read=True)
+        self.like(self.fans[1])
+        Notification.objects.filter(is_read=False).update(timestamp=timezone.now() - timedelta(days=1))
+        self.like(self.fans[2])
+
+        self.assertEqual(Notification.objects.count(), 3)
+        self.assertEqual(set(Notification.objects.values_list('actor_count', flat=True)), {1})
+
+    def test_each_target_gets_its_own_row(self):
+        other = Post.objects.create(author=self.author, title='Other', content='Body')
+        self.like(self.fans[0])
+        self.like(self.fans[1], other)
+        self.assertEqual(Notification.objects.count(), 2)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, NOTIFICATION_ASYNC=False)
+class UnreadNotificationTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='user')
+        self.actor = User.objects.create_user(username='actor')
+        self.notifications = [
+            Notification.objects.create(recipient=self.user, actor=self.actor, verb=f'poked you {n}')
+            for n in range(5)
+        ]
+        self.client.force_authenticate(self.user)
+
+    def unread(self):
+        return self.client.get('/api/notifications/unread-count/').data['unread']
+
+    def test_unread_count_is_cached_until_changed(self):
+        self.assertEqual(self.unread(), 5)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.unread(), 5)
+
+        post = Post.objects.create(author=self.user, title='Post', content='Body')
+        self.client.force_authenticate(self.actor)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/postsposts/{post.id}/like/')
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.unread(), 6)
+
+    def test_mark_all_read(self):
+        self.assertEqual(self.unread(), 5)
+        response = self.client.post('/api/notifications/mark-all-read/')
+        self.assertEqual(response.data['marked'], 5)
+        self.assertEqual(self.unread(), 0)
+
+    def test_mark_read_up_to_a_notification(self):
+        with self.assertNumQueries(1):
+            response = self.client.post('/api/notifications/mark-read/', {'up_to': self.notifications[2].id})
+        self.assertEqual(response.data['marked'], 3)
+        self.assertEqual(
+            list(Notification.objects.filter(is_read=False).order_by('id')),
+            self.notifications[3:],
+        )
+
+    def test_mark_read_ignores_other_users_notifications(self):
+        stranger = User.objects.create_user(username='stranger')
+        self.client.force_authenticate(stranger)
+        response = self.client.post('/api/notifications/mark-read/', {'up_to': self.notifications[4].id})
+        self.assertEqual(response.data['marked'], 0)
+
+
+
+class BrokerTestCase(APITestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        self.broker = Broker(backlog=3)
+
+    def test_resume_from_last_event_id(self):
+        first = self.broker.publish(1, {'n': 1})
+        self.broker.publish(1, {'n': 2})
+        self.broker.publish(2, {'n': 'other user'})
+
+        subscription, missed, gap = self.broker.subscribe(1, first, loop=self.loop)
+        self.assertFalse(gap)
+        self.assertEqual([data for _, _, data in missed], [{'n': 2}])
+        subscription.close()
+        self.assertEqual(self.broker.subscriber_count(), 0)
+
+    def test_gap_when_backlog_or_process_changed(self):
+        first = self.broker.publish(1, {'n': 0})
+        self.broker.publish(1, {'n': 1})
+        self.assertFalse(self.broker.subscribe(1, first, loop=self.loop)[2])
+        for n in range(3):
+            self.broker.publish(1, {'n': n + 2})
+
+        self.assertTrue(self.broker.subscribe(1, first, loop=self.loop)[2])
+        self.assertTrue(self.broker.subscribe(1, 'stale-7', loop=self.loop)[2])
+
+    def test_idle_backlogs_are_pruned(self):
+        broker = Broker(backlog=3, retention=60)
+        with mock.patch('notifications.broker.time.monotonic', return_value=0):
+            first = broker.publish(1, {'n': 1})
+            second = broker.publish(1, {'n': 2})
+            broker.publish(2, {'n': 'other user'})
+            subscription, _, _ = broker.subscribe(3, loop=self.loop)
+        with mock.patch('notifications.broker.time.monotonic', return_value=61):
+            broker.publish(4, {'n': 'someone active'})
+            # Users 1 and 2 went idle; user 3 is still connected
+            self.assertEqual(set(broker._backlog), {4})
+            self.assertEqual(set(broker._touched), {3, 4})
+            # Away for longer than the retention: resync, even once new events arrive
+            self.assertTrue(broker.subscribe(1, second, loop=self.loop)[2])
+            third = broker.publish(1, {'n': 3})
+            self.assertTrue(broker.subscribe(1, first, loop=self.loop)[2])
+            _, missed, gap = broker.subscribe(1, third, loop=self.loop)
+            self.assertEqual((missed, gap), ([], False))
+        subscription.close()
+
+    def test_resync_id_marks_where_the_client_reloaded(self):
+        self.broker.publish(1, {'n': 1})
+        subscription, _, gap = self.broker.subscribe(1, 'stale-7', loop=self.loop)
+        self.assertTrue(gap)
+        later = self.broker.publish(1, {'n': 2})
+        _, missed, gap = self.broker.subscribe(1, subscription.resync_id, loop=self.loop)
+        self.assertEqual(([event[1] for event in missed], gap), ([later], False))
+
+    def test_live_events_reach_subscribers(self):
+        subscription, _, _ = self.broker.subscribe(1, loop=self.loop)
+        self.broker.publish(1, {'n': 1})
+        events = self.loop.run_until_complete(subscription.next_events(timeout=1))
+        self.assertEqual([data for _, _, data in events], [{'n': 1}])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, NOTIFICATION_ASYNC=False)
+class NotificationStreamTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='user')
+        self.token = Token.objects.create(user=self.user)
+
+    async def test_stream_replays_missed_events(self):
+        seen = broker.publish(self.user.pk, {'verb': 'seen'})
+        broker.publish(self.user.pk, {'verb': 'missed'})
+
+        response = await self.async_client.get(
+            '/api/notifications/stream/',
+            headers={'Authorization': f'Token {self.token.key}', 'Last-Event-ID': seen},
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunk = await anext(response.streaming_content)
+        await response.streaming_content.aclose()
+        self.assertIn(b'event: notification', chunk)
+        self.assertIn(b'"verb": "missed"', chunk)
+
+    async def test_stream_requires_authentication(self):
+        response = await self.async_client.get('/api/notifications/stream/')
+        self.assertEqual(response.status_code, 401)
+
+    def test_pipeline_publishes_written_notifications(self):
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        subscription, _, _ = broker.subscribe(self.user.pk, loop=loop)
+        self.addCleanup(subscription.close)
+
+        author = User.objects.create_user(username='author')
+        post = Post.objects.create(author=self.user, title='Post', content='Body')
+        self.client.force_authenticate(author)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/postsposts/{post.id}/like/')
+
+        events = loop.run_until_complete(subscription.next_events(timeout=1))
+        self.assertEqual([data['verb'] for _, _, data in events], ['liked your post'])
+
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class NotificationTargetTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='user')
+        actor = User.objects.create_user(username='actor')
+        for n in range(6):
+            post = Post.objects.create(author=self.user, title=f'Post {n}', content='Body')
+            comment = Comment.objects.create(post=post, author=actor, content=f'Reply {n}')
+            Notification.objects.create(recipient=self.user, actor=actor, verb='liked your post', target=post)
+            Notification.objects.create(recipient=self.user, actor=actor, verb='commented', target=comment)
+        Notification.objects.create(recipient=self.user, actor=actor, verb='waved')
+        self.client.force_authenticate(self.user)
+
+    def test_targets_are_resolved_in_one_query_per_type(self):
+        for page_size in (3, 13):
+            # notifications page + posts + comments
+            with self.assertNumQueries(3):
+                response = self.client.get('/api/notifications/', {'page_size': page_size})
+            self.assertEqual(len(response.data['results']), page_size)
+
+        targets = {row['verb']: row['target'] for row in response.data['results']}
+        self.assertIsNone(targets['waved'])
+        self.assertEqual(targets['liked your post'], {'type': 'post', 'id': Post.objects.first().id, 'title': 'Post 0'})
+        self.assertEqual(targets['commented']['type'], 'comment')
+
+    def test_deleted_target_resolves_to_none(self):
+        Post.objects.all().delete()
+        response = self.client.get('/api/notifications/', {'page_size': 13})
+        self.assertEqual({row['target'] for row in response.data['results']}, {None})
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Notification
+
+
+def _cache_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def unread_count(user):
+    """Unread badge count, served from the cache and recounted from the partial index on a miss."""
+    return cache.get_or_set(
+        _cache_key(user.pk),
+        lambda: Notification.objects.filter(recipient=user, is_read=False).count(),
+        getattr(settings, 'NOTIFICATION_UNREAD_CACHE_TIMEOUT', 300),
+    )
+
+
+def invalidate(*user_ids):
+    # Reaches other worker processes only when CACHES is shared (REDIS_URL); with the
+    # local-memory fallback their badges stay stale for NOTIFICATION_UNREAD_CACHE_TIMEOUT
+    cache.delete_many([_cache_key(user_id) for user_id in user_ids])
@@ -1,14 +1,126 @@
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import render
+from django.db.models import Q, Subquery
+from accounts.authentication import CachedTokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework import generics
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .broker import broker
 from .models import Notification
-from .serializers import NotificationSerializer
+from .serializers import NotificationSerializer, MarkReadSerializer
+from . import unread
 
 class NotificationListView(generics.ListAPIView):
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
+    keyset_fields = ('timestamp', 'id')
 
     def get_queryset(self):
         return Notification.objects.filter(
             recipient=self.request.user
-        ).order_by('-timestamp')
+        ).order_by('-timestamp', '-id')
+
+
+
+class UnreadCountView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response({'unread': unread.unread_count(request.user)})
+
+
+class MarkAllReadView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        marked = Notification.objects.filter(recipient=request.user, is_read=False).update(is_read=True)
+        unread.invalidate(request.user.pk)
+        return Response({'marked': marked})
+
+
+class MarkReadView(APIView):
+    permission_classes = [IsAuthenticated]
+    serializer_class = MarkReadSerializer
+
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        up_to = serializer.validated_data['up_to']
+
+        # Single UPDATE: the cursor row's timestamp is looked up in a subquery
+        cursor = Notification.objects.filter(pk=up_to, recipient=request.user)
+        timestamp = Subquery(cursor.values('timestamp')[:1])
+        marked = Notification.objects.filter(
+            Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lte=up_to),
+            recipient=request.user,
+            is_read=False,
+        ).update(is_read=True)
+        unread.invalidate(request.user.pk)
+        return Response({'marked': marked})
+
+
+
+def _sse(event_id, event, data):
+    return f'id: {event_id}\nevent: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n'
+
+
+async def _authenticate(request):
+    try:
+        authenticated = await sync_to_async(CachedTokenAuthentication().authenticate)(request)
+    except AuthenticationFailed:
+        return None
+    if authenticated is not None:
+        return authenticated[0]
+    user = await request.auser()
+    return user if user.is_authenticated else None
+
+
+async def notification_stream(request):
+    """
+    Server-sent events stream of the user's notifications.
+
+    Clients reconnect with the Last-Event-ID header (or ?last_event_id=) to receive
+    what they missed; a `resync` event means the gap is too large and the client
+    should reload /api/notifications/. The stream ends after
+    NOTIFICATION_STREAM_TIMEOUT seconds and is meant to be served by an ASGI server.
+    """
+    user = await _authenticate(request)
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    subscription, missed, gap = broker.subscribe(user.pk, last_event_id)
+
+    async def events():
+        try:
+            if gap:
+                yield _sse(subscription.resync_id, 'resync', {})
+            for _, event_id, data in missed:
+                yield _sse(event_id, 'notification', data)
+
+            heartbeat = getattr(settings, 'NOTIFICATION_STREAM_HEARTBEAT', 15)
+            deadline = time.monotonic() + getattr(settings, 'NOTIFICATION_STREAM_TIMEOUT', 300)
+            while time.monotonic() < deadline:
+                received = await subscription.next_events(timeout=min(heartbeat, deadline - time.monotonic()))
+                if subscription.overflowed:
+                    yield _sse(subscription.resync_id, 'resync', {})
+                    break
+                if not received:
+                    yield ': keep-alive\n\n'
+                for _, event_id, data in received:
+                    yield _sse(event_id, 'notification', data)
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -4,3 +4,19 @@ from django.apps import AppConfig
 class PostsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'posts'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from notifications import targets
+        from .models import Post, Comment
+
+        targets.register(
+            Post,
+            lambda post: {'id': post.pk, 'title': post.title},
+            queryset=lambda: Post.objects.only('id', 'title'),
+        )
+        targets.register(
+            Comment,
+            lambda comment: {'id': comment.pk, 'post': comment.post_id, 'excerpt': comment.content[:100]},
+            queryset=lambda: Comment.objects.only('id', 'post_id', 'content'),
+        )
@@ -0,0 +1,67 @@
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def _generation_key(namespace):
+    return f'list-cache:{namespace}:generation'
+
+
+def get_generation(namespace):
+    return cache.get_or_set(_generation_key(namespace), lambda: time.time_ns())
+
+
+def bump_generation(namespace):
+    """Invalidate every cached page of `namespace` at once."""
+    try:
+        cache.incr(_generation_key(namespace))
+    except ValueError:
+        # Key evicted: restart from the clock so old generations are never reused
+        cache.set(_generation_key(namespace), time.time_ns(), None)
+
+
+class CachedListMixin:
+    """
+    Read-through cache for anonymous `list` responses.
+
+    Pages are keyed by the namespace generation and the normalized query string
+    (filters, search, ordering, cursor, page size), so bumping the generation from a
+    model signal invalidates them all. Each entry carries an ETag; a request whose
+    If-None-Match matches gets a 304 without touching the database.
+
+    The generation lives in the default cache, so invalidation only reaches other
+    worker processes when CACHES is shared (REDIS_URL); with the local-memory
+    fallback, other processes serve stale pages for up to LIST_CACHE_TIMEOUT.
+    """
+    cache_namespace = None
+
+    def get_list_cache_key(self, request):
+        params = sorted((key, value) for key, value in request.query_params.lists() if any(value))
+        raw = json.dumps([request.get_host(), request.path, request.accepted_renderer.format, params])
+        digest = hashlib.sha256(raw.encode()).hexdigest()
+        return f'list-cache:{self.cache_namespace}:{get_generation(self.cache_namespace)}:{digest}'
+
+    def list(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().list(request, *args, **kwargs)
+
+        key = self.get_list_cache_key(request)
+        entry = cache.get(key)
+        if entry is None:
+            response = super().list(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            body = json.dumps(response.data, cls=JSONEncoder, sort_keys=True)
+            entry = {'data': response.data, 'etag': f'"{hashlib.md5(body.encode()).hexdigest()}"'}
+            cache.set(key, entry, getattr(settings, 'LIST_CACHE_TIMEOUT', 60))
+
+        headers = {'ETag': entry['etag'], 'Vary': 'Authorization, Cookie'}
+        if entry['etag'] in request.headers.get('If-None-Match', ''):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(entry['data'], headers=headers)
@@ -0,0 +1,47 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Post, Comment, Like
+
+User = get_user_model()
+Follow = User.followers.through
+
+
+def _count_of(model, field):
+    """Correlated COUNT(*) of `model` rows whose `field` points at the outer row."""
+    counts = (
+        model.objects.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('*'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+# (model, counter column, related model, related field)
+COUNTERS = [
+    (Post, 'likes_count', Like, 'post'),
+    (Post, 'comments_count', Comment, 'post'),
+    (User, 'followers_count', Follow, 'from_customuser'),
+    (User, 'following_count', Follow, 'to_customuser'),
+]
+
+
+def drifted(model, column, related_model, related_field):
+    """Rows whose stored counter disagrees with the real count."""
+    return model.objects.exclude(**{column: _count_of(related_model, related_field)})
+
+
+def reconcile(dry_run=False):
+    """Repair every drifted counter with one UPDATE per column; returns {label: rows repaired}."""
+    repaired = {}
+    for model, column, related_model, related_field in COUNTERS:
+        label = f'{model._meta.label}.{column}'
+        rows = drifted(model, column, related_model, related_field)
+        if dry_run:
+            repaired[label] = rows.count()
+        else:
+            repaired[label] = rows.update(**{column: _count_of(related_model, related_field)})
+    return repaired
@@ -0,0 +1,154 @@
+import heapq
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+
+from .models import Post, FeedItem
+
+FEED_BACKFILL_LIMIT = getattr(settings, 'FEED_BACKFILL_LIMIT', 100)
+FEED_BATCH_SIZE = getattr(settings, 'FEED_BATCH_SIZE', 1000)
+
+User = get_user_model()
+
+
+def _feed_item(owner_id, post):
+    return FeedItem(owner_id=owner_id, post_id=post.id, author_id=post.author_id, created_at=post.created_at)
+
+
+def _position(post):
+    return (post.created_at, post.id)
+
+
+def fan_out(post):
+    """Push a newly created post into the feed of every follower of its author."""
+    fan_out_many(post.author, [post])
+
+
+def fan_out_many(author, posts):
+    """Push several new posts by one author into their followers' feeds, one batch at a time."""
+    follower_ids = list(author.followers.values_list('id', flat=True))
+    items = (_feed_item(follower_id, post) for post in posts for follower_id in follower_ids)
+    while batch := list(islice(items, FEED_BATCH_SIZE)):
+        FeedItem.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def _recent(author, limit):
+    return Post.objects.filter(author=author).only('id', 'author_id', 'created_at').order_by('-created_at', '-id')[:limit]
+
+
+def backfill(user, author, limit=FEED_BACKFILL_LIMIT):
+    """Copy the most recent posts of a newly followed author into the user's feed."""
+    posts = _recent(author, limit)
+    FeedItem.objects.bulk_create(
+        [_feed_item(user.id, post) for post in posts],
+        batch_size=FEED_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def trim(user, author):
+    """Drop every post of an unfollowed author from the user's feed."""
+    trim_many(user, [author.pk])
+
+
+def trim_many(user, author_ids):
+    FeedItem.objects.filter(owner=user, author__in=author_ids).delete()
+
+
+class FeedEngine:
+    """
+    Hybrid push/pull home feed.
+
+    Posts by regular authors are fanned out into FeedItem rows when written.
+    Posts by authors with at least `celebrity_threshold` followers are not
+    fanned out; they are pulled at read time and merged with the pushed rows.
+    An author who drops back below the threshold stops being pulled, so their
+    recent posts are fanned out to their followers at that point.
+    """
+
+    def __init__(self, celebrity_threshold=None):
+        self._celebrity_threshold = celebrity_threshold
+
+    @property
+    def celebrity_threshold(self):
+        if self._celebrity_threshold is not None:
+            return self._celebrity_threshold
+        return getattr(settings, 'FEED_CELEBRITY_THRESHOLD', 10000)
+
+    def is_celebrity(self, author):
+        return author.followers_count >= self.celebrity_threshold
+
+    def followed_celebrities(self, user):
+        return user.following.filter(followers_count__gte=self.celebrity_threshold).values_list('id', flat=True)
+
+    # Write path
+    def publish(self, post):
+        if not self.is_celebrity(post.author):
+            fan_out(post)
+
+    def publish_many(self, author, posts):
+        if not self.is_celebrity(author):
+            fan_out_many(author, posts)
+
+    def follow(self, user, author, limit=FEED_BACKFILL_LIMIT):
+        if not self.is_celebrity(author):
+            backfill(user, author, limit)
+
+    def unfollow(self, user, author):
+        self.unfollow_many(user, [author.pk])
+
+    def unfollow_many(self, user, author_ids):
+        """Call after the unfollowed authors' followers_count has been decremented."""
+        trim_many(user, author_ids)
+        # Each unfollow takes a count down by one, so an author crossed below the threshold iff it now sits just under it
+        for author in User.objects.filter(pk__in=author_ids, followers_count=self.celebrity_threshold - 1):
+            fan_out_many(author, _recent(author, FEED_BACKFILL_LIMIT))
+
+    # Read path
+    def pushed(self, user, limit, before=None, queryset=None):
+        # One filter() call, so the owner and cursor conditions (and the ordering) share a single FeedItem join
+        conditions = [Q(feed_items__owner=user)]
+        if before is not None:
+            created_at, post_id = before
+            conditions += [
+                Q(feed_items__created_at__lte=created_at),
+                Q(feed_items__created_at__lt=created_at)
+                | Q(feed_items__created_at=created_at, feed_items__post__lt=post_id),
+            ]
+        posts = (Post.objects.all() if queryset is None else queryset).filter(*conditions)
+        return posts.order_by('-feed_items__created_at', '-feed_items__post')[:limit]
+
+    def pulled(self, user, limit, before=None, queryset=None):
+        celebrity_ids = list(self.followed_celebrities(user))
+        if not celebrity_ids:
+            return []
+        posts = (Post.objects.all() if queryset is None else queryset).filter(author_id__in=celebrity_ids)
+        if before is not None:
+            created_at, post_id = before
+            posts = posts.filter(
+                Q(created_at__lte=created_at),
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=post_id),
+            )
+        return posts.order_by('-created_at', '-id')[:limit]
+
+    def get_feed(self, user, limit, before=None, queryset=None):
+        """
+        Return up to `limit` feed posts strictly older than the `before` (created_at, id)
+        position. `queryset` is the base Post queryset, e.g. with select_related applied.
+        """
+        streams = [self.pushed(user, limit, before, queryset), self.pulled(user, limit, before, queryset)]
+        feed, seen = [], set()
+        # An author who crossed the threshold can have the same post in both streams
+        for post in heapq.merge(*streams, key=_position, reverse=True):
+            if post.id in seen:
+                continue
+            seen.add(post.id)
+            feed.append(post)
+            if len(feed) == limit:
+                break
+        return feed
+
+
+engine = FeedEngine()
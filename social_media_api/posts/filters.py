@@ -0,0 +1,13 @@
+from rest_framework import filters
+
+from .search import get_backend
+
+
+class PostSearchFilter(filters.SearchFilter):
+    """`?search=` backed by the full-text index instead of icontains scans; keeps the view's ordering."""
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, '').strip()
+        if not text:
+            return queryset
+        return get_backend(queryset.db).filter(queryset, text)
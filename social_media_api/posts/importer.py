@@ -0,0 +1,140 @@
+import csv
+import json
+from collections import defaultdict
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from . import feed
+from .cache import bump_generation
+from .models import Post
+from .search import get_backend
+from .serializers import PostSerializer
+
+User = get_user_model()
+
+
+class RowError(Exception):
+    pass
+
+
+def read_ndjson(lines):
+    """Yield one dict per non-blank line; malformed lines yield a RowError instead."""
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield RowError('Invalid JSON')
+            continue
+        yield row if isinstance(row, dict) else RowError('Expected a JSON object')
+
+
+def read_csv(lines):
+    lines = (line.decode('utf-8') if isinstance(line, bytes) else line for line in lines)
+    yield from csv.DictReader(lines)
+
+
+READERS = {
+    'ndjson': read_ndjson,
+    'csv': read_csv,
+}
+
+
+class ImportResult:
+    def __init__(self):
+        self.created = 0
+        self.errors = []
+
+    def as_dict(self):
+        return {'created': self.created, 'errors': self.errors}
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def import_posts(rows, author=None, batch_size=None, fan_out=True, using='default', max_errors=1000):
+    """
+    Validate and insert posts in chunks of `batch_size` rows.
+
+    Each chunk is validated with PostSerializer(many=True) and written with one
+    bulk_create inside its own transaction. Invalid rows are skipped and reported
+    by their 1-based row number (at most `max_errors` of them). Without `author`,
+    every row must name its author by username in an `author` column.
+    """
+    batch_size = batch_size or getattr(settings, 'POST_IMPORT_BATCH_SIZE', 1000)
+    result = ImportResult()
+
+    def error(row_number, errors):
+        if len(result.errors) < max_errors:
+            result.errors.append({'row': row_number, 'errors': errors})
+
+    for chunk in _chunks(enumerate(rows, start=1), batch_size):
+        candidates = []
+        for row_number, row in chunk:
+            if isinstance(row, RowError):
+                error(row_number, {'non_field_errors': [str(row)]})
+            elif not isinstance(row, dict):
+                error(row_number, {'non_field_errors': ['Expected an object.']})
+            else:
+                candidates.append((row_number, dict(row)))
+
+        authors = {}
+        if author is None:
+            usernames = {row.get('author') for _, row in candidates}
+            authors = dict(User.objects.using(using).filter(username__in=usernames).values_list('username', 'id'))
+
+        valid, data = [], []
+        for row_number, row in candidates:
+            author_id = author.pk if author is not None else authors.get(row.pop('author', None))
+            if author_id is None:
+                error(row_number, {'author': ['Unknown author.']})
+                continue
+            valid.append((row_number, author_id))
+            data.append(row)
+
+        serializer = PostSerializer(data=data, many=True)
+        if not serializer.is_valid():
+            # Older DRF reports one entry per row, newer only {index: errors} for failing rows
+            row_errors = serializer.errors
+            if isinstance(row_errors, list):
+                row_errors = dict(enumerate(row_errors))
+            accepted = []
+            for index, ((row_number, author_id), row) in enumerate(zip(valid, data)):
+                if row_errors.get(index):
+                    error(row_number, row_errors[index])
+                else:
+                    accepted.append(((row_number, author_id), row))
+            valid = [entry for entry, _ in accepted]
+            serializer = PostSerializer(data=[row for _, row in accepted], many=True)
+            serializer.is_valid(raise_exception=True)
+
+        posts = [
+            Post(author_id=author_id, **validated)
+            for (_, author_id), validated in zip(valid, serializer.validated_data)
+        ]
+        if not posts:
+            continue
+        with transaction.atomic(using=using):
+            posts = Post.objects.using(using).bulk_create(posts, batch_size=batch_size)
+            get_backend(using).index(posts)
+            if fan_out:
+                by_author = defaultdict(list)
+                for post in posts:
+                    by_author[post.author_id].append(post)
+                authors_by_id = User.objects.using(using).in_bulk(list(by_author))
+                for author_id, authored in by_author.items():
+                    feed.engine.publish_many(authors_by_id[author_id], authored)
+        result.created += len(posts)
+
+    if result.created:
+        bump_generation('posts')
+    return result
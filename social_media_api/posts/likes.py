@@ -0,0 +1,86 @@
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.utils import timezone
+
+from notifications.pipeline import pipeline
+from . import trending
+from .cache import bump_generation
+from .models import Post, Like
+
+User = get_user_model()
+
+
+def _in_clause(values):
+    return ', '.join(['%s'] * len(values))
+
+
+def _adjust_counts(cursor, post_ids, delta):
+    """Move likes_count and the trending score by `delta` on the given posts; returns {post_id: author_id}."""
+    posts_table = connection.ops.quote_name(Post._meta.db_table)
+    cursor.execute(
+        f'UPDATE {posts_table} SET likes_count = likes_count + %s '
+        f'WHERE id IN ({_in_clause(post_ids)}) RETURNING id, author_id',
+        [delta, *post_ids],
+    )
+    authors = dict(cursor.fetchall())
+    Post.objects.filter(pk__in=post_ids).update(**trending.bump(delta * trending.like_weight()))
+    return authors
+
+
+@transaction.atomic
+def like_posts(user, post_ids):
+    """
+    Like every post in `post_ids` that exists and is not liked yet; returns the ids newly liked.
+
+    The like rows are written by one INSERT ... SELECT ... ON CONFLICT DO NOTHING, so
+    posts are not loaded first and concurrent double-taps cannot raise IntegrityError:
+    the unique (user, post) constraint decides and the loser inserts nothing.
+    """
+    post_ids = sorted(set(post_ids))
+    if not post_ids:
+        return []
+    likes_table = connection.ops.quote_name(Like._meta.db_table)
+    posts_table = connection.ops.quote_name(Post._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {likes_table} (user_id, post_id, created_at) '
+            f'SELECT %s, id, %s FROM {posts_table} WHERE id IN ({_in_clause(post_ids)}) '
+            f'ON CONFLICT (user_id, post_id) DO NOTHING RETURNING post_id',
+            [user.pk, timezone.now(), *post_ids],
+        )
+        liked = sorted(row[0] for row in cursor.fetchall())
+        authors = _adjust_counts(cursor, liked, 1) if liked else {}
+
+    for post_id, author_id in authors.items():
+        if author_id != user.pk:
+            # Only primary keys are needed to queue the notification
+            pipeline.notify(
+                recipient=User(pk=author_id),
+                actor=user,
+                verb="liked your post",
+                target=Post(pk=post_id),
+            )
+    if liked:
+        transaction.on_commit(lambda: bump_generation('posts'))
+    return liked
+
+
+@transaction.atomic
+def unlike_posts(user, post_ids):
+    """Remove the user's likes on `post_ids` with one DELETE; returns the ids actually unliked."""
+    post_ids = sorted(set(post_ids))
+    if not post_ids:
+        return []
+    likes_table = connection.ops.quote_name(Like._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {likes_table} WHERE user_id = %s AND post_id IN ({_in_clause(post_ids)}) RETURNING post_id',
+            [user.pk, *post_ids],
+        )
+        unliked = sorted(row[0] for row in cursor.fetchall())
+        if unliked:
+            _adjust_counts(cursor, unliked, -1)
+
+    if unliked:
+        transaction.on_commit(lambda: bump_generation('posts'))
+    return unliked
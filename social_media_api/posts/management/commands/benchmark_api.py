@@ -0,0 +1,87 @@
+import json
+import random
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from social_media_api import benchmark
+from social_media_api.benchmark import Endpoint
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the feed, post list, like and notification endpoints on a synthetic network with '
+        'power-law follower and like counts, and compare against a baseline file. All data is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--posts-per-user', type=int, default=5)
+        parser.add_argument('--max-followers', type=int, default=300,
+                            help='Follower count of the most followed user.')
+        parser.add_argument('--max-likes', type=int, default=200, help='Like count of the most liked post.')
+        parser.add_argument('--skew', type=float, default=1.1, help='Zipf exponent of follower and like counts.')
+        parser.add_argument('--readers', type=int, default=20)
+        parser.add_argument('--requests', type=int, default=200, help='Timed requests per endpoint and round.')
+        parser.add_argument('--rounds', type=int, default=5,
+                            help='Timed rounds per endpoint; the p50 compared is the median of the round medians.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--baseline', default=str(settings.BASE_DIR / 'benchmark_baseline.json'))
+        parser.add_argument('--save-baseline', action='store_true', help='Write the results as the new baseline.')
+        parser.add_argument('--tolerance', type=float, default=0.5,
+                            help='Allowed p50 latency growth over the baseline (0.5 = 50%%).')
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        config = {key: options[key] for key in ('users', 'posts_per_user', 'max_followers', 'max_likes',
+                                                 'skew', 'readers', 'requests', 'seed')}
+        with transaction.atomic():
+            users, sizes = benchmark.generate(
+                options['users'], options['posts_per_user'], options['max_followers'], options['max_likes'],
+                options['skew'],
+            )
+            self.stdout.write('Generated ' + ', '.join(f'{count} {name}' for name, count in sizes.items()) + '.\n')
+            results = self.run(users, options)
+            transaction.set_rollback(True)
+
+        if options['save_baseline']:
+            with open(options['baseline'], 'w') as handle:
+                json.dump({'config': config, 'results': results}, handle, indent=2, sort_keys=True)
+                handle.write('\n')
+            self.stdout.write(f"Baseline written to {options['baseline']}")
+            return
+
+        try:
+            with open(options['baseline']) as handle:
+                baseline = json.load(handle)
+        except FileNotFoundError:
+            self.stdout.write('No baseline to compare with; run with --save-baseline to record one.')
+            return
+        if baseline['config'] != config:
+            self.stdout.write('Baseline was recorded with other options; not comparing.')
+            return
+        failures = benchmark.regressions(results, baseline['results'], options['tolerance'])
+        if failures:
+            raise CommandError('Regressions against the baseline:\n  ' + '\n  '.join(failures))
+        self.stdout.write('No regressions against the baseline.')
+
+    def run(self, users, options):
+        readers = random.sample(users, min(options['readers'], len(users)))
+        liked = {user.id: random.choice(users).posts.values_list('id', flat=True).first() for user in readers}
+        endpoints = [
+            Endpoint('feed', '/api/postsfeed/'),
+            Endpoint('posts', '/api/postsposts/'),
+            Endpoint('like', lambda user: f'/api/postsposts/{liked[user.id]}/like/', method='post'),
+            Endpoint('notifications', '/api/notifications/'),
+        ]
+
+        self.stdout.write(f"{'endpoint':<16}{'queries':>9}{'scans':>7}{'p50 ms':>9}{'p99 ms':>9}")
+        results = {}
+        for endpoint in endpoints:
+            result = results[endpoint.name] = benchmark.measure(endpoint, readers, options['requests'], options['rounds'])
+            self.stdout.write(
+                f"{endpoint.name:<16}{result['queries']:>9}{result['scans']:>7}"
+                f"{result['p50_ms']:>9.2f}{result['p99_ms']:>9.2f}"
+            )
+        return results
@@ -0,0 +1,71 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.feed import FeedEngine
+from posts.models import Post, FeedItem
+from social_media_api import benchmark
+from social_media_api.benchmark import percentile
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark feed reads under push-only, pull-only and hybrid strategies on a synthetic '
+        'follow graph with Zipf-distributed follower counts. All data is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2000)
+        parser.add_argument('--posts-per-user', type=int, default=5)
+        parser.add_argument('--max-followers', type=int, default=1500,
+                            help='Follower count of the most followed author.')
+        parser.add_argument('--skew', type=float, default=1.1, help='Zipf exponent of the follower distribution.')
+        parser.add_argument('--threshold', type=int, default=200, help='Celebrity threshold for the hybrid run.')
+        parser.add_argument('--reads', type=int, default=300)
+        parser.add_argument('--page-size', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        with transaction.atomic():
+            users = self.generate(options)
+            strategies = [
+                ('push', FeedEngine(celebrity_threshold=len(users) + 1)),
+                ('hybrid', FeedEngine(celebrity_threshold=options['threshold'])),
+                ('pull', FeedEngine(celebrity_threshold=0)),
+            ]
+            self.stdout.write(f"{'strategy':<10}{'fan-out rows':>14}{'write s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+            for name, engine in strategies:
+                self.run(name, engine, users, options)
+            transaction.set_rollback(True)
+
+    def generate(self, options):
+        users = benchmark.generate_users(options['users'])
+        edges = benchmark.generate_follows(users, options['max_followers'], options['skew'])
+        posts = benchmark.generate_posts(users, options['posts_per_user'])
+        self.stdout.write(f'Generated {len(users)} users, {len(edges)} follow edges and {len(posts)} posts.\n')
+        return users
+
+    def run(self, name, engine, users, options):
+        user_ids = [user.id for user in users]
+        FeedItem.objects.filter(owner_id__in=user_ids).delete()
+
+        started = time.perf_counter()
+        for post in Post.objects.filter(author_id__in=user_ids).select_related('author').iterator():
+            engine.publish(post)
+        write_seconds = time.perf_counter() - started
+        fan_out_rows = FeedItem.objects.filter(owner_id__in=user_ids).count()
+
+        samples = []
+        for reader in random.choices(users, k=options['reads']):
+            started = time.perf_counter()
+            engine.get_feed(reader, limit=options['page_size'])
+            samples.append((time.perf_counter() - started) * 1000)
+
+        self.stdout.write(
+            f'{name:<10}{fan_out_rows:>14}{write_seconds:>10.2f}'
+            f'{statistics.median(samples):>10.2f}{percentile(samples, 99):>10.2f}'
+        )
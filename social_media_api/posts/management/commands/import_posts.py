@@ -0,0 +1,55 @@
+import sys
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import importer
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Stream posts from an NDJSON or CSV file into the database in validated bulk batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import, or - for stdin.')
+        parser.add_argument('--format', choices=sorted(importer.READERS), help='Defaults to the file extension.')
+        parser.add_argument('--author', help='Username owning every post; otherwise each row needs an author column.')
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--no-fan-out', action='store_true',
+                            help='Skip pushing posts into feeds (run rebuild_feeds afterwards).')
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or ('csv' if path.endswith('.csv') else 'ndjson')
+
+        author = None
+        if options['author']:
+            try:
+                author = User.objects.using(options['database']).get(username=options['author'])
+            except User.DoesNotExist:
+                raise CommandError(f"Unknown author {options['author']!r}")
+
+        started = time.perf_counter()
+        stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        try:
+            result = importer.import_posts(
+                importer.READERS[file_format](stream),
+                author=author,
+                batch_size=options['batch_size'],
+                fan_out=not options['no_fan_out'],
+                using=options['database'],
+            )
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        elapsed = time.perf_counter() - started
+
+        for row_error in result.errors:
+            self.stderr.write(f"row {row_error['row']}: {row_error['errors']}")
+        rate = result.created / elapsed if elapsed else result.created
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {result.created} posts in {elapsed:.2f}s ({rate:.0f} rows/s), {len(result.errors)} rejected.'
+        ))
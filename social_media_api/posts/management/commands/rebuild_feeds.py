@@ -0,0 +1,31 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import feed
+from posts.models import FeedItem
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the materialized home feeds from the follow graph and existing posts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=feed.FEED_BACKFILL_LIMIT,
+                            help='Number of recent posts to copy per followed author.')
+
+    # One transaction, so readers keep seeing the old feeds until the new ones are complete
+    @transaction.atomic
+    def handle(self, *args, **options):
+        FeedItem.objects.all().delete()
+
+        follows = User.followers.through.objects.select_related('from_customuser', 'to_customuser')
+        edges = 0
+        for follow in follows.iterator():
+            # to_customuser follows from_customuser
+            # Through the engine, so celebrities' posts stay pulled rather than copied
+            feed.engine.follow(follow.to_customuser, follow.from_customuser, limit=options['limit'])
+            edges += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt feeds for {edges} follow relationships.'))
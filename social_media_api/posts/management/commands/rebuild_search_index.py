@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.search import get_backend
+
+
+class Command(BaseCommand):
+    help = 'Re-index every post in the full-text search backend of a database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        backend = get_backend(options['database'])
+        posts = Post.objects.using(options['database']).only('id', 'title', 'content').order_by('id')
+        batch, total = [], 0
+        for post in posts.iterator(chunk_size=options['batch_size']):
+            batch.append(post)
+            if len(batch) == options['batch_size']:
+                backend.index(batch)
+                total += len(batch)
+                batch = []
+        backend.index(batch)
+        total += len(batch)
+        self.stdout.write(self.style.SUCCESS(f'Indexed {total} posts.'))
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = 'Repair drift in the denormalized like, comment and follower counters.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many rows have drifted.')
+        parser.add_argument('--interval', type=int, default=0,
+                            help='Keep running in the background, reconciling every N seconds.')
+
+    def handle(self, *args, **options):
+        while True:
+            for label, rows in counters.reconcile(dry_run=options['dry_run']).items():
+                verb = 'drifted' if options['dry_run'] else 'repaired'
+                self.stdout.write(f'{label}: {rows} {verb}')
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = 'Renormalize trending scores and precompute the ranking served by /posts/trending/.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=int, default=0,
+                            help='Keep running in the background, refreshing every N seconds '
+                                 '(TRENDING_REFRESH_INTERVAL is a good value).')
+
+    def handle(self, *args, **options):
+        while True:
+            ranked = trending.refresh()
+            self.stdout.write(f'{len(ranked)} trending posts')
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:50
+
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def seed_scores(apps, schema_editor):
+    # Replay the last few half-lives of likes and comments; older activity has decayed away
+    Post = apps.get_model('posts', 'Post')
+    half_life = float(getattr(settings, 'TRENDING_HALF_LIFE', 6 * 3600))
+    now = time.time()
+    since = datetime.fromtimestamp(now - 10 * half_life, tz=timezone.utc)
+    scores = defaultdict(float)
+    for model_name, weight in [('Like', 'TRENDING_LIKE_WEIGHT'), ('Comment', 'TRENDING_COMMENT_WEIGHT')]:
+        weight = float(getattr(settings, weight, 1 if model_name == 'Like' else 3))
+        events = apps.get_model('posts', model_name).objects.filter(created_at__gte=since)
+        for post_id, created_at in events.values_list('post_id', 'created_at').iterator():
+            scores[post_id] += weight * 2 ** ((created_at.timestamp() - now) / half_life)
+    Post.objects.bulk_update(
+        [Post(pk=post_id, trending_score=score, trending_at=now) for post_id, score in scores.items()],
+        ['trending_score', 'trending_at'],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_post_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='trending_at',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='trending_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('trending_score__gt', 0)), fields=['-trending_score'], name='post_trending_idx'),
+        ),
+        migrations.RunPython(seed_scores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.db import migrations
+
+
+def backfill_feeds(apps, schema_editor):
+    """
+    Copy every followed author's recent posts into their followers' feeds, as
+    rebuild_feeds does, so feeds are not empty after FeedView moved to FeedItem.
+    Authors at FEED_CELEBRITY_THRESHOLD or above are pulled at read time instead.
+    """
+    FeedItem = apps.get_model('posts', 'FeedItem')
+    if FeedItem.objects.exists():
+        # Already materialized, e.g. by rebuild_feeds
+        return
+    Post = apps.get_model('posts', 'Post')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Follow = User.followers.through
+    limit = getattr(settings, 'FEED_BACKFILL_LIMIT', 100)
+    batch_size = getattr(settings, 'FEED_BATCH_SIZE', 1000)
+    threshold = getattr(settings, 'FEED_CELEBRITY_THRESHOLD', 10000)
+
+    batch = []
+    authors = User.objects.filter(followers_count__gt=0, followers_count__lt=threshold)
+    for author_id in list(authors.values_list('pk', flat=True)):
+        posts = list(
+            Post.objects.filter(author_id=author_id).order_by('-created_at', '-id').values_list('id', 'created_at')[:limit]
+        )
+        if not posts:
+            continue
+        follower_ids = Follow.objects.filter(from_customuser_id=author_id).values_list('to_customuser_id', flat=True)
+        for follower_id in list(follower_ids):
+            batch += [
+                FeedItem(owner_id=follower_id, post_id=post_id, author_id=author_id, created_at=created_at)
+                for post_id, created_at in posts
+            ]
+            if len(batch) >= batch_size:
+                FeedItem.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+    FeedItem.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_comment_thread_idx'),
+        ('accounts', '0002_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_feeds, migrations.RunPython.noop),
+    ]
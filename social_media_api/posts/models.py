@@ -10,6 +10,21 @@ class Post(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Denormalized counters, kept in step by the like and comment views (see reconcile_counters)
+    likes_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+
+    # Time-decayed activity score as of trending_at (unix seconds), see posts.trending
+    trending_score = models.FloatField(default=0)
+    trending_at = models.FloatField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='post_recent_idx'),
+            models.Index(fields=['author', '-created_at', '-id'], name='post_author_recent_idx'),
+            models.Index(fields=['-trending_score'], condition=models.Q(trending_score__gt=0), name='post_trending_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -21,6 +36,12 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='comment_recent_idx'),
+            models.Index(fields=['post', 'created_at', 'id'], name='comment_thread_idx'),
+        ]
+
     def __str__(self):
         return f'Comment by {self.author.username} on {self.post.title}'
     
@@ -32,3 +53,25 @@ class Like(models.Model):
 
     class Meta:
         unique_together = ('user', 'post')
+
+
+class FeedItem(models.Model):
+    # Materialized home feed: one row per (follower, post), written on post creation
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='feed_items')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='feed_items')
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('owner', 'post')
+        indexes = [
+            models.Index(fields=['owner', '-created_at', '-post'], name='feeditem_owner_recent_idx'),
+            models.Index(fields=['owner', 'author'], name='feeditem_owner_author_idx'),
+        ]
+
+
+class TrendingPost(models.Model):
+    # The ranking precomputed by posts.trending.refresh, shared by every worker; rank 0 is the top
+    rank = models.PositiveIntegerField(primary_key=True)
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
@@ -0,0 +1,135 @@
+import re
+
+from django.db import connections
+from django.db.models.expressions import RawSQL
+
+
+FTS_TABLE = 'posts_post_fts'
+SEARCH_CONFIG = 'english'
+
+
+def parse_query(text):
+    """
+    Split user input into (term, is_prefix) pairs.
+
+    A trailing `*` asks for a prefix match; the last term is always prefix-matched
+    so results update while the user is still typing.
+    """
+    terms = re.findall(r'(\w+)(\*?)', text.lower())
+    return [(term, bool(star) or index == len(terms) - 1) for index, (term, star) in enumerate(terms)]
+
+
+class SearchBackend:
+    """Keeps a full-text index of posts and queries it. One subclass per database vendor."""
+
+    def __init__(self, using):
+        self.using = using
+
+    def index(self, posts):
+        """Add or refresh posts in the index."""
+
+    def remove(self, post_ids):
+        """Drop posts from the index."""
+
+    def filter(self, queryset, text):
+        """Restrict `queryset` to posts matching `text`, keeping its ordering."""
+        raise NotImplementedError
+
+    def search(self, text, limit, offset=0):
+        """Return [(post_id, score)] for posts matching `text`, best first."""
+        raise NotImplementedError
+
+
+class SQLiteFTS5Backend(SearchBackend):
+    """FTS5 virtual table keyed by post id, ranked with bm25() (title weighted over content)."""
+
+    def match_expression(self, text):
+        return ' '.join(f'"{term}"*' if prefix else f'"{term}"' for term, prefix in parse_query(text))
+
+    def index(self, posts):
+        rows = [(post.pk, post.title, post.content) for post in posts]
+        if rows:
+            with connections[self.using].cursor() as cursor:
+                cursor.executemany(f'INSERT OR REPLACE INTO {FTS_TABLE} (rowid, title, content) VALUES (%s, %s, %s)', rows)
+
+    def remove(self, post_ids):
+        post_ids = list(post_ids)
+        if post_ids:
+            with connections[self.using].cursor() as cursor:
+                cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(pk,) for pk in post_ids])
+
+    def filter(self, queryset, text):
+        match = self.match_expression(text)
+        if not match:
+            return queryset.none()
+        return queryset.filter(pk__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match]))
+
+    def search(self, text, limit, offset=0):
+        match = self.match_expression(text)
+        if not match:
+            return []
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid, -bm25({FTS_TABLE}, 2.0, 1.0) FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s ORDER BY bm25({FTS_TABLE}, 2.0, 1.0), rowid LIMIT %s OFFSET %s',
+                [match, limit, offset],
+            )
+            return cursor.fetchall()
+
+
+def search_vector():
+    from django.contrib.postgres.search import SearchVector
+
+    # Must stay identical to the expression of the GIN index created in migration 0007
+    return (
+        SearchVector('title', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('content', weight='B', config=SEARCH_CONFIG)
+    )
+
+
+class PostgresBackend(SearchBackend):
+    """
+    tsvector search backed by a GIN expression index, so there is nothing to keep
+    in sync by hand. Postgres has no BM25; results are ranked with ts_rank_cd.
+    """
+
+    def search_query(self, text):
+        from django.contrib.postgres.search import SearchQuery
+
+        terms = parse_query(text)
+        if not terms:
+            return None
+        raw = ' & '.join(f'{term}:*' if prefix else term for term, prefix in terms)
+        return SearchQuery(raw, search_type='raw', config=SEARCH_CONFIG)
+
+    def filter(self, queryset, text):
+        query = self.search_query(text)
+        if query is None:
+            return queryset.none()
+        return queryset.alias(search_document=search_vector()).filter(search_document=query)
+
+    def search(self, text, limit, offset=0):
+        from django.contrib.postgres.search import SearchRank
+        from .models import Post
+
+        query = self.search_query(text)
+        if query is None:
+            return []
+        return list(
+            Post.objects.using(self.using)
+            .alias(search_document=search_vector())
+            .filter(search_document=query)
+            .annotate(score=SearchRank(search_vector(), query, cover_density=True))
+            .order_by('-score', 'id')
+            .values_list('id', 'score')[offset:offset + limit]
+        )
+
+
+BACKENDS = {
+    'sqlite': SQLiteFTS5Backend,
+    'postgresql': PostgresBackend,
+}
+
+
+def get_backend(using='default'):
+    return BACKENDS[connections[using].vendor](using)
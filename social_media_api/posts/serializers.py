@@ -6,7 +6,10 @@ class PostSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Post
-        fields = ['id', 'author', 'title', 'content', 'created_at', 'updated_at']
+        fields = ['id', 'author', 'title', 'content', 'likes_count', 'comments_count', 'created_at', 'updated_at']
+        read_only_fields = ['likes_count', 'comments_count']
+        # Relations read while rendering (see social_media_api.mixins.OptimizedQuerysetMixin)
+        select_related = {'author': ['username']}
 
 
 class CommentSerializer(serializers.ModelSerializer):
@@ -16,3 +19,9 @@ class CommentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Comment
         fields = ['id', 'post', 'author', 'content', 'created_at', 'updated_at']
+        select_related = {'author': ['username']}
+
+
+class BatchLikeSerializer(serializers.Serializer):
+    like = serializers.ListField(child=serializers.IntegerField(), required=False, default=list, max_length=100)
+    unlike = serializers.ListField(child=serializers.IntegerField(), required=False, default=list, max_length=100)
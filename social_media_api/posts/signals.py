@@ -0,0 +1,30 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .cache import bump_generation
+from .models import Post, Comment, Like
+from .search import get_backend
+
+
+# Keep the full-text index in step with posts (bulk_create callers use get_backend().index)
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, using, **kwargs):
+    get_backend(using).index([instance])
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, using, **kwargs):
+    get_backend(using).remove([instance.pk])
+
+
+# Cached list pages (see posts.cache); like and comment counts are rendered on posts
+@receiver([post_save, post_delete], sender=Post)
+@receiver([post_save, post_delete], sender=Like)
+def invalidate_post_lists(sender, **kwargs):
+    bump_generation('posts')
+
+
+@receiver([post_save, post_delete], sender=Comment)
+def invalidate_comment_lists(sender, **kwargs):
+    bump_generation('posts')
+    bump_generation('comments')
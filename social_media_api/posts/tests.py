@@ -1,3 +1,551 @@
-from django.test import TestCase
+import json
+from io import StringIO
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection, connections
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from .models import Post, Comment, FeedItem, Like
+from . import counters, likes, trending
+from .views import PostViewSet
+
+User = get_user_model()
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class FeedTestCase(APITestCase):
+    def setUp(self):
+        self.reader = User.objects.create_user(username='reader')
+        self.author = User.objects.create_user(username='author')
+        self.other = User.objects.create_user(username='other')
+        self.client.force_authenticate(self.reader)
+
+    def follow(self, user):
+        return self.client.post(f'/api/accounts/follow/{user.id}/')
+
+    def create_post(self, user, title):
+        user.refresh_from_db()
+        self.client.force_authenticate(user)
+        response = self.client.post('/api/postsposts/', {'title': title, 'content': 'Body'})
+        self.client.force_authenticate(self.reader)
+        return response
+
+    def test_new_post_is_pushed_to_followers(self):
+        self.follow(self.author)
+        self.create_post(self.author, 'Fresh')
+        self.create_post(self.other, 'Unrelated')
+
+        response = self.client.get('/api/postsfeed/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([p['title'] for p in response.data['results']], ['Fresh'])
+
+    def test_follow_backfills_and_unfollow_trims(self):
+        Post.objects.create(author=self.author, title='Old', content='Body')
+        self.follow(self.author)
+        self.assertEqual(FeedItem.objects.filter(owner=self.reader).count(), 1)
+
+        self.client.post(f'/api/accounts/unfollow/{self.author.id}/')
+        self.assertFalse(FeedItem.objects.filter(owner=self.reader).exists())
+
+    @override_settings(FEED_CELEBRITY_THRESHOLD=2)
+    def test_celebrity_posts_are_pulled_and_merged(self):
+        fan = User.objects.create_user(username='fan')
+        self.client.force_authenticate(fan)
+        self.follow(self.author)
+        self.client.force_authenticate(self.reader)
+        self.follow(self.author)
+        self.follow(self.other)
+
+        self.create_post(self.other, 'Pushed first')
+        self.create_post(self.author, 'Pulled')
+        self.create_post(self.other, 'Pushed last')
+        self.assertFalse(FeedItem.objects.filter(author=self.author).exists())
+
+        response = self.client.get('/api/postsfeed/')
+        self.assertEqual(
+            [p['title'] for p in response.data['results']],
+            ['Pushed last', 'Pulled', 'Pushed first'],
+        )
+
+    @override_settings(FEED_CELEBRITY_THRESHOLD=2)
+    def test_author_dropping_below_the_threshold_is_fanned_out(self):
+        fan = User.objects.create_user(username='fan')
+        self.follow(self.author)
+        self.client.force_authenticate(fan)
+        self.follow(self.author)
+        self.create_post(self.author, 'Written as a celebrity')
+        self.assertFalse(FeedItem.objects.exists())
+
+        self.client.force_authenticate(fan)
+        self.client.post(f'/api/accounts/unfollow/{self.author.id}/')
+        self.client.force_authenticate(self.reader)
+        response = self.client.get('/api/postsfeed/')
+        self.assertEqual([p['title'] for p in response.data['results']], ['Written as a celebrity'])
+
+    def test_later_pages_ignore_other_followers_items(self):
+        for n in range(4):
+            self.client.force_authenticate(User.objects.create_user(username=f'fan{n}'))
+            self.follow(self.author)
+        self.client.force_authenticate(self.reader)
+        self.follow(self.author)
+        for n in range(6):
+            self.create_post(self.author, f't{n}')
+
+        titles, url = [], '/api/postsfeed/?page_size=2'
+        while url:
+            response = self.client.get(url)
+            titles += [p['title'] for p in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(titles, ['t5', 't4', 't3', 't2', 't1', 't0'])
+
+    @override_settings(FEED_CELEBRITY_THRESHOLD=2)
+    def test_rebuild_leaves_celebrities_pulled(self):
+        fan = User.objects.create_user(username='fan')
+        self.follow(self.author)
+        self.follow(self.other)
+        self.client.force_authenticate(fan)
+        self.follow(self.author)
+        Post.objects.create(author=self.author, title='Pulled', content='Body')
+        Post.objects.create(author=self.other, title='Pushed', content='Body')
+
+        call_command('rebuild_feeds', stdout=StringIO())
+        self.assertEqual(list(FeedItem.objects.values_list('post__title', flat=True)), ['Pushed'])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class KeysetPaginationTestCase(APITestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        for n in range(25):
+            Post.objects.create(author=self.author, title=f'Post {n}', content='Body')
+        # Force ties on created_at so paging has to fall back to the id
+        Post.objects.filter(id__lte=Post.objects.order_by('id')[9].id).update(created_at=Post.objects.first().created_at)
+
+    def walk(self, url):
+        titles, pages = [], 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            titles += [p['title'] for p in response.data['results']]
+            url = response.data['next']
+            pages += 1
+        return titles, pages
+
+    def test_pages_cover_every_post_once_in_order(self):
+        titles, pages = self.walk('/api/postsposts/')
+        expected = [p.title for p in Post.objects.order_by('-created_at', '-id')]
+        self.assertEqual(titles, expected)
+        self.assertEqual(pages, 3)
+
+    def test_previous_link_returns_the_earlier_page(self):
+        first = self.client.get('/api/postsposts/?page_size=5')
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+        self.assertEqual(back.data['results'], first.data['results'])
+        self.assertIsNone(first.data['previous'])
+
+    def test_ascending_ordering_is_respected(self):
+        titles, _ = self.walk('/api/postsposts/?ordering=created_at')
+        self.assertEqual(titles, [p.title for p in Post.objects.order_by('created_at', 'id')])
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get('/api/postsposts/?cursor=garbage')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class CounterTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='user')
+        self.author = User.objects.create_user(username='author')
+        self.post = Post.objects.create(author=self.author, title='Counted', content='Body')
+        self.client.force_authenticate(self.user)
+
+    def test_like_and_comment_counters(self):
+        self.client.post(f'/api/postsposts/{self.post.id}/like/')
+        self.client.post(f'/api/postsposts/{self.post.id}/like/')
+        self.client.post('/api/postscomments/', {'post': self.post.id, 'content': 'Nice'})
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.likes_count, self.post.comments_count), (1, 1))
+
+        self.client.post(f'/api/postsposts/{self.post.id}/unlike/')
+        self.client.post(f'/api/postsposts/{self.post.id}/unlike/')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 0)
+
+    def test_editing_a_post_keeps_concurrent_counts(self):
+        load = PostViewSet.get_object
+
+        def load_then_like(view):
+            post = load(view)
+            likes.like_posts(self.user, [post.id])  # lands after the post was loaded
+            return post
+
+        self.client.force_authenticate(self.author)
+        with mock.patch.object(PostViewSet, 'get_object', load_then_like):
+            response = self.client.patch(f'/api/postsposts/{self.post.id}/', {'title': 'Edited'})
+        self.assertEqual(response.data['title'], 'Edited')
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.title, self.post.likes_count), ('Edited', 1))
+
+    def test_follow_counters(self):
+        self.client.post(f'/api/accounts/follow/{self.author.id}/')
+        self.client.post(f'/api/accounts/follow/{self.author.id}/')
+        self.author.refresh_from_db()
+        self.user.refresh_from_db()
+        self.assertEqual((self.author.followers_count, self.user.following_count), (1, 1))
+
+        self.client.post(f'/api/accounts/unfollow/{self.author.id}/')
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.followers_count, 0)
+
+    def test_reconcile_repairs_drift(self):
+        Like.objects.create(user=self.user, post=self.post)
+        self.author.following.add(self.user)
+
+        repaired = counters.reconcile()
+        self.assertEqual(repaired['posts.Post.likes_count'], 1)
+        self.assertEqual(repaired['accounts.CustomUser.followers_count'], 1)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+        self.assertFalse(any(counters.reconcile(dry_run=True).values()))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class QueryCountTestCase(APITestCase):
+    """List endpoints must run a fixed number of queries, whatever the page size."""
+
+    def setUp(self):
+        self.reader = User.objects.create_user(username='reader')
+        self.client.force_authenticate(self.reader)
+        for n in range(10):
+            author = User.objects.create_user(username=f'author{n}')
+            self.client.post(f'/api/accounts/follow/{author.id}/')
+            for m in range(3):
+                post = Post.objects.create(author=author, title=f'Post {n}.{m}', content='Body')
+                FeedItem.objects.create(owner=self.reader, post=post, author=author, created_at=post.created_at)
+                Comment.objects.create(post=post, author=author, content='Reply')
+
+    def assertConstantQueries(self, url, expected):
+        counts = []
+        for page_size in (2, 25):
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url, {'page_size': page_size})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(response.data['results']), page_size)
+            counts.append(len(context))
+        self.assertEqual(counts, [expected, expected], f'{url} ran {counts} queries')
+
+    def test_post_list(self):
+        self.assertConstantQueries('/api/postsposts/', 1)
+
+    def test_comment_list(self):
+        self.assertConstantQueries('/api/postscomments/', 1)
+
+    def test_feed(self):
+        # pushed rows + followed celebrity lookup
+        self.assertConstantQueries('/api/postsfeed/', 2)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class SearchTestCase(APITestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.exact = Post.objects.create(author=self.author, title='Django performance', content='Indexes matter')
+        self.body = Post.objects.create(author=self.author, title='Notes', content='Tuning django queries')
+        Post.objects.create(author=self.author, title='Gardening', content='Tomatoes and basil')
+
+    def search(self, text):
+        return [p['id'] for p in self.client.get('/api/postsposts/search/', {'q': text}).data['results']]
+
+    def test_ranked_search_prefers_title_matches(self):
+        self.assertEqual(self.search('django'), [self.exact.id, self.body.id])
+
+    def test_prefix_queries(self):
+        self.assertEqual(self.search('perf'), [self.exact.id])
+        self.assertEqual(self.search('tomat* basil'), [Post.objects.get(title='Gardening').id])
+
+    def test_empty_query_returns_nothing(self):
+        self.assertEqual(self.search('   '), [])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.exact.title = 'Flask performance'
+        self.exact.save()
+        self.assertEqual(self.search('django'), [self.body.id])
+        self.body.delete()
+        self.assertEqual(self.search('django'), [])
+
+    def test_list_search_filter_keeps_recency_order(self):
+        response = self.client.get('/api/postsposts/', {'search': 'django'})
+        self.assertEqual([p['id'] for p in response.data['results']], [self.body.id, self.exact.id])
+
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ListCacheTestCase(APITestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.post = Post.objects.create(author=self.author, title='Cached', content='Body')
+
+    def test_repeat_reads_are_served_from_cache(self):
+        first = self.client.get('/api/postsposts/', {'ordering': '-created_at'})
+        with self.assertNumQueries(0):
+            second = self.client.get('/api/postsposts/', {'ordering': '-created_at', 'search': ''})
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(first['ETag'], second['ETag'])
+
+    def test_if_none_match_returns_304_without_queries(self):
+        etag = self.client.get('/api/postsposts/')['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/postsposts/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_writes_invalidate_cached_pages(self):
+        etag = self.client.get('/api/postsposts/')['ETag']
+        Comment.objects.create(post=self.post, author=self.author, content='New')
+        Post.objects.filter(pk=self.post.pk).update(comments_count=1)
+
+        response = self.client.get('/api/postsposts/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['comments_count'], 1)
+
+    def test_authenticated_requests_bypass_the_cache(self):
+        self.client.get('/api/postsposts/')
+        self.client.force_authenticate(self.author)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/postsposts/')
+        self.assertNotIn('ETag', response)
+
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, POST_IMPORT_BATCH_SIZE=2)
+class BulkImportTestCase(APITestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.follower = User.objects.create_user(username='follower')
+        self.author.followers.add(self.follower)
+        self.client.force_authenticate(self.author)
+
+    def test_json_list_with_row_errors(self):
+        rows = [{'title': 'One', 'content': 'Body'}, {'title': 'Two'}, {'title': 'Three', 'content': 'Body'}]
+        response = self.client.post('/api/postsposts/bulk/', rows, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual([e['row'] for e in response.data['errors']], [2])
+        self.assertIn('content', response.data['errors'][0]['errors'])
+        self.assertEqual(FeedItem.objects.filter(owner=self.follower).count(), 2)
+        self.assertEqual(len(self.client.get('/api/postsposts/search/', {'q': 'three'}).data['results']), 1)
+
+    def test_streamed_ndjson(self):
+        body = '\n'.join([json.dumps({'title': f'Post {n}', 'content': 'Body'}) for n in range(5)] + ['{oops'])
+        response = self.client.generic('POST', '/api/postsposts/bulk/', body, content_type='application/x-ndjson')
+        self.assertEqual(response.data['created'], 5)
+        self.assertEqual(response.data['errors'], [{'row': 6, 'errors': {'non_field_errors': ['Invalid JSON']}}])
+        self.assertEqual(set(Post.objects.values_list('author', flat=True)), {self.author.id})
+
+    def test_import_command_reads_csv_with_author_column(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as handle:
+            handle.write('author,title,content\nauthor,From CSV,Body\nghost,Nobody,Body\n')
+        call_command('import_posts', handle.name, stdout=open('/dev/null', 'w'), stderr=open('/dev/null', 'w'))
+        self.assertEqual(list(Post.objects.values_list('title', 'author__username')), [('From CSV', 'author')])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, NOTIFICATION_ASYNC=False)
+class LikeTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='user')
+        self.author = User.objects.create_user(username='author')
+        self.posts = [Post.objects.create(author=self.author, title=f'Post {n}', content='Body') for n in range(3)]
+        self.client.force_authenticate(self.user)
+
+    def test_like_is_idempotent(self):
+        for _ in range(2):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(f'/api/postsposts/{self.posts[0].id}/like/')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Post.objects.get(pk=self.posts[0].id).likes_count, 1)
+        self.assertEqual(self.author.notifications.get().actor_count, 1)
+
+        self.assertEqual(self.client.post('/api/postsposts/999/like/').status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.post('/api/postsposts/999/unlike/').status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_batch(self):
+        first, second, third = (post.id for post in self.posts)
+        likes.like_posts(self.user, [third])
+        response = self.client.post(
+            '/api/postslikes/batch/', {'like': [first, second, first, 999], 'unlike': [third, 999]}, format='json',
+        )
+        self.assertEqual(response.data, {'liked': [first, second], 'unliked': [third]})
+        self.assertEqual(
+            dict(Post.objects.values_list('id', 'likes_count')), {first: 1, second: 1, third: 0},
+        )
+
+        response = self.client.post('/api/postslikes/batch/', {'like': list(range(101))}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class LikeConcurrencyTestCase(TransactionTestCase):
+    def setUp(self):
+        self.users = [User.objects.create_user(username=f'user{n}') for n in range(8)]
+        self.post = Post.objects.create(author=self.users[0], title='Hot', content='Body')
+
+    def hammer(self, action, rounds=4):
+        def attempt(user):
+            # The in-memory test database runs in shared-cache mode, where SQLite reports
+            # lock contention at once instead of waiting out the busy timeout
+            while True:
+                try:
+                    return len(action(user, [self.post.id]))
+                except OperationalError as error:
+                    if 'locked' not in str(error):
+                        raise
+
+        def tap(user):
+            try:
+                return [attempt(user) for _ in range(rounds)]
+            finally:
+                connections.close_all()
+
+        # Every user double-taps from several threads at once
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            return sum(sum(taps) for taps in executor.map(tap, self.users * 2))
+
+    # Notifications are written after commit and would contend for the same locks
+    @mock.patch.object(likes.pipeline, 'notify')
+    def test_concurrent_double_taps(self, notify):
+        self.assertEqual(self.hammer(likes.like_posts), len(self.users))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, len(self.users))
+        self.assertEqual(Like.objects.count(), len(self.users))
+
+        self.assertEqual(self.hammer(likes.unlike_posts), len(self.users))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 0)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, NOTIFICATION_ASYNC=False, TRENDING_HALF_LIFE=3600)
+class TrendingTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.fans = [User.objects.create_user(username=f'fan{n}') for n in range(3)]
+        self.old, self.new, self.quiet = (
+            Post.objects.create(author=self.author, title=title, content='Body') for title in ('Old', 'New', 'Quiet')
+        )
+
+    def test_scores_decay_and_rank(self):
+        now = time.time()
+        # Three likes two half-lives ago are worth 0.75 now; one comment just now is worth 3
+        Post.objects.filter(pk=self.old.pk).update(**trending.bump(3, now - 7200))
+        Post.objects.filter(pk=self.new.pk).update(**trending.bump(3, now))
+        self.assertEqual([post_id for post_id, _ in trending.top(10, now)], [self.new.id, self.old.id])
+        self.assertAlmostEqual(dict(trending.top(10, now))[self.old.id], 0.75)
+
+        # Renormalizing rewrites scores as of now and drops the ones below the floor
+        trending.renormalize(now + 3600 * 5)
+        self.assertEqual(Post.objects.filter(trending_score__gt=0).count(), 2)
+        trending.renormalize(now + 3600 * 20)
+        self.assertFalse(Post.objects.filter(trending_score__gt=0).exists())
+
+    def test_endpoint_serves_precomputed_ranking(self):
+        for fan in self.fans:
+            likes.like_posts(fan, [self.old.id])
+        self.client.force_authenticate(self.fans[0])
+        self.client.post('/api/postscomments/', {'post': self.new.id, 'content': 'Hot take'})
+        likes.unlike_posts(self.fans[0], [self.old.id])
+        call_command('refresh_trending', stdout=StringIO())
+
+        self.client.force_authenticate(None)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/postsposts/trending/', {'page_size': 1})
+        self.assertEqual(len(queries), 1)
+        self.assertEqual([post['title'] for post in response.data['results']], ['New'])
+        self.assertAlmostEqual(response.data['results'][0]['score'], 3, places=2)
+        response = self.client.get(response.data['next'])
+        self.assertEqual([post['title'] for post in response.data['results']], ['Old'])
+        self.assertAlmostEqual(response.data['results'][0]['score'], 2, places=2)
+        self.assertIsNone(response.data['next'])
+
+        # Another worker's cache is empty: the ranking comes from the table, not a recompute
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/postsposts/trending/')
+        self.assertEqual([post['title'] for post in response.data['results']], ['New', 'Old'])
+        self.assertTrue(all(query['sql'].startswith('SELECT') for query in queries))
+
+    def test_reads_never_recompute(self):
+        likes.like_posts(self.fans[0], [self.old.id])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/postsposts/trending/')
+        self.assertEqual(response.data['results'], [])
+        self.assertTrue(all(query['sql'].startswith('SELECT') for query in queries))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, COMMENT_STREAM_BATCH_SIZE=4)
+class PostCommentsTestCase(APITestCase):
+    def setUp(self):
+        author = User.objects.create_user(username='author')
+        self.post = Post.objects.create(author=author, title='Busy', content='Body')
+        commenters = [User.objects.create_user(username=f'commenter{n}') for n in range(10)]
+        Comment.objects.bulk_create([
+            Comment(post=self.post, author=commenter, content=f'Comment {n}') for n, commenter in enumerate(commenters)
+        ])
+        Comment.objects.create(post=Post.objects.create(author=author, title='Other', content='Body'), author=author, content='Elsewhere')
+
+    def test_thread_is_paged_oldest_first(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/postsposts/{self.post.id}/comments/', {'page_size': 6})
+        self.assertEqual(len(queries), 2)
+        self.assertEqual([c['content'] for c in response.data['results']], [f'Comment {n}' for n in range(6)])
+        self.assertEqual(response.data['results'][0]['author'], 'commenter0')
+        response = self.client.get(response.data['next'])
+        self.assertEqual([c['content'] for c in response.data['results']], [f'Comment {n}' for n in range(6, 10)])
+        self.assertEqual(self.client.get('/api/postsposts/999/comments/').status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_streamed_thread(self):
+        response = self.client.get(f'/api/postsposts/{self.post.id}/comments/', {'stream': '1'})
+        comments = json.loads(b''.join(response.streaming_content))
+        self.assertEqual([c['content'] for c in comments], [f'Comment {n}' for n in range(10)])
+
+        empty = Post.objects.create(author=self.post.author, title='Quiet', content='Body')
+        response = self.client.get(f'/api/postsposts/{empty.id}/comments/', {'stream': '1'})
+        self.assertEqual(json.loads(b''.join(response.streaming_content)), [])
+
+
+class BenchmarkTestCase(APITestCase):
+    def test_benchmark_compares_with_baseline(self):
+        options = {'users': 30, 'posts_per_user': 2, 'max_followers': 10, 'max_likes': 5, 'readers': 3,
+                   'requests': 3, 'rounds': 2, 'stdout': StringIO()}
+        with tempfile.NamedTemporaryFile('r+', suffix='.json') as baseline:
+            call_command('benchmark_api', baseline=baseline.name, save_baseline=True, **options)
+            recorded = json.load(baseline)
+            self.assertEqual(set(recorded['results']), {'feed', 'posts', 'like', 'notifications'})
+            self.assertEqual(recorded['results']['posts']['scans'], 0)
+            self.assertFalse(User.objects.exists())
+
+            def rewrite():
+                baseline.seek(0)
+                baseline.truncate()
+                json.dump(recorded, baseline)
+                baseline.flush()
+
+            # A slower tail alone is reported, not failed
+            for result in recorded['results'].values():
+                result['p99_ms'] = 0
+            rewrite()
+            call_command('benchmark_api', baseline=baseline.name, tolerance=100, **options)
+
+            recorded['results']['feed']['queries'] -= 1
+            rewrite()
+            with self.assertRaisesMessage(CommandError, 'feed: queries'):
+                call_command('benchmark_api', baseline=baseline.name, tolerance=100, **options)
@@ -0,0 +1,112 @@
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Greatest, Ln, Power
+from django.db.models.lookups import LessThan
+
+from .models import Post, TrendingPost
+
+CACHE_KEY = 'posts:trending'
+
+
+def half_life():
+    return float(getattr(settings, 'TRENDING_HALF_LIFE', 6 * 3600))
+
+
+def like_weight():
+    return float(getattr(settings, 'TRENDING_LIKE_WEIGHT', 1))
+
+
+def comment_weight():
+    return float(getattr(settings, 'TRENDING_COMMENT_WEIGHT', 3))
+
+
+def _decayed(now):
+    """`trending_score` decayed from `trending_at` to `now`: score * 2 ** ((at - now) / half_life)."""
+    return F('trending_score') * Power(Value(2.0), (F('trending_at') - Value(now)) / Value(half_life()))
+
+
+def bump(weight, now=None):
+    """
+    Update kwargs adding `weight` (negative to retract) to a post's trending score.
+
+    Merged into the UPDATE that already moves the like or comment counter, e.g.
+    `Post.objects.filter(pk=pk).update(likes_count=..., **trending.bump(1))`.
+    """
+    now = time.time() if now is None else now
+    return {
+        'trending_score': Greatest(_decayed(now) + Value(float(weight)), Value(0.0)),
+        'trending_at': Value(now),
+    }
+
+
+def renormalize(now=None):
+    """
+    Rewrite every live score as of `now` in one UPDATE. Scores that decayed below
+    TRENDING_FLOOR are zeroed so they drop out of the partial index `top` reads.
+    """
+    now = time.time() if now is None else now
+    floor = float(getattr(settings, 'TRENDING_FLOOR', 0.01))
+    return Post.objects.filter(trending_score__gt=0).update(
+        trending_score=Case(
+            When(LessThan(_decayed(now), Value(floor)), then=Value(0.0)),
+            default=_decayed(now),
+            output_field=FloatField(),
+        ),
+        trending_at=Value(now),
+    )
+
+
+def top(limit, now=None):
+    """
+    The `limit` highest scores as [(post_id, score at `now`)], best first.
+
+    Scores kept at different times compare through their log, log(score) + at * ln2 / half_life,
+    which is the log of the score at any common time up to a constant.
+    """
+    now = time.time() if now is None else now
+    rows = (
+        Post.objects.filter(trending_score__gt=0)
+        .annotate(rank=Ln(F('trending_score')) + F('trending_at') * Value(math.log(2) / half_life()))
+        .order_by('-rank', '-id')
+        .values_list('id', 'trending_score', 'trending_at')[:limit]
+    )
+    return [(post_id, score * 2 ** ((at - now) / half_life())) for post_id, score, at in rows]
+
+
+def refresh(now=None):
+    """
+    Renormalize, then store the top TRENDING_SIZE posts in TrendingPost for the
+    trending endpoint. Run by refresh_trending, never on a request.
+    """
+    renormalize(now)
+    ranked = top(getattr(settings, 'TRENDING_SIZE', 100), now)
+    with transaction.atomic():
+        TrendingPost.objects.all().delete()
+        TrendingPost.objects.bulk_create(
+            [TrendingPost(rank=rank, post_id=post_id, score=score) for rank, (post_id, score) in enumerate(ranked)]
+        )
+    cache.set(CACHE_KEY, ranked, _cache_timeout())
+    return ranked
+
+
+def _cache_timeout():
+    return getattr(settings, 'TRENDING_REFRESH_INTERVAL', 300)
+
+
+def trending():
+    """
+    The precomputed ranking as [(post_id, score)]: from the cache, else from
+    TrendingPost. Read-only; empty until refresh_trending has run once.
+    """
+    ranked = cache.get(CACHE_KEY)
+    if ranked is None:
+        ranked = list(TrendingPost.objects.order_by('rank').values_list('post_id', 'score'))
+        if ranked:
+            # Bounded by one refresh interval, so a per-process cache is never staler than that
+            cache.set(CACHE_KEY, ranked, _cache_timeout())
+    return ranked
@@ -1,6 +1,8 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import PostViewSet, CommentViewSet, FeedView, LikePostView, UnlikePostView
+from .views import (
+    PostViewSet, CommentViewSet, PostCommentsView, FeedView, LikePostView, UnlikePostView, BatchLikeView,
+)
 
 router = DefaultRouter()
 router.register(r'posts', PostViewSet)
@@ -9,6 +11,8 @@ router.register(r'comments', CommentViewSet)
 urlpatterns = [
     path('', include(router.urls)),
     path('feed/', FeedView.as_view()),
+    path('posts/<int:pk>/comments/', PostCommentsView.as_view(), name='post-comments'),
     path('posts/<int:pk>/like/', LikePostView.as_view(), name='like-post'),
     path('posts/<int:pk>/unlike/', UnlikePostView.as_view(), name='unlike-post'),
+    path('likes/batch/', BatchLikeView.as_view(), name='batch-like'),
 ]
\ No newline at end of file
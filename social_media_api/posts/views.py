@@ -1,14 +1,31 @@
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
 from django.shortcuts import render
-from rest_framework import generics, viewsets, permissions, filters
+from django.db import transaction
+from django.db.models import F, Q
+from rest_framework import generics, viewsets, permissions, filters, status
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.generics import ListAPIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 from rest_framework.response import Response
-
-from .models import Post, Comment, Like
-from .serializers import PostSerializer, CommentSerializer
-from notifications.models import Notification
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
+from rest_framework.utils.urls import replace_query_param
+
+from .models import Post, Comment
+from .serializers import PostSerializer, CommentSerializer, BatchLikeSerializer
+from . import feed
+from .cache import CachedListMixin
+from .filters import PostSearchFilter
+from . import importer
+from . import likes
+from . import trending
+from .search import get_backend
+from social_media_api.mixins import OptimizedQuerysetMixin
 
 
 class IsOwnerOrReadOnly(permissions.BasePermission):
@@ -20,23 +37,105 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
         return obj.author == request.user
 
 
-class PostViewSet(viewsets.ModelViewSet):
-    queryset = Post.objects.all().order_by('-created_at')
+class PostViewSet(CachedListMixin, OptimizedQuerysetMixin, viewsets.ModelViewSet):
+    queryset = Post.objects.all().order_by('-created_at', '-id')
+    cache_namespace = 'posts'
     serializer_class = PostSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
 
     #  Filtering & Searching
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, PostSearchFilter, filters.OrderingFilter]
     filterset_fields = ['author']
     search_fields = ['title', 'content']
     ordering_fields = ['created_at']
 
+    @transaction.atomic
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
-
+        post = serializer.save(author=self.request.user)
+        feed.engine.publish(post)
+
+    def perform_update(self, serializer):
+        # Save only the edited columns: serializer.save() would write back likes_count,
+        # comments_count and the trending score as loaded, undoing likes and comments
+        # that landed in between
+        post = serializer.instance
+        for field, value in serializer.validated_data.items():
+            setattr(post, field, value)
+        post.save(update_fields=[*serializer.validated_data, 'updated_at'])
+
+    # Bulk creation: a JSON list, or a streamed NDJSON / CSV body, validated and inserted in chunks
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request):
+        content_type = request.content_type.split(';')[0].strip()
+        if content_type in ('application/x-ndjson', 'text/csv'):
+            reader = importer.READERS['csv' if content_type == 'text/csv' else 'ndjson']
+            rows = reader(request.stream or [])
+        elif isinstance(request.data, list):
+            rows = request.data
+        else:
+            return Response(
+                {'detail': 'Expected a JSON list, NDJSON (application/x-ndjson) or CSV (text/csv).'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-class CommentViewSet(viewsets.ModelViewSet):
-    queryset = Comment.objects.all().order_by('-created_at')
+        result = importer.import_posts(rows, author=request.user)
+        if not result.errors:
+            response_status = status.HTTP_201_CREATED
+        elif result.created:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response(result.as_dict(), status=response_status)
+
+    # Relevance-ranked full-text search: /posts/search/?q=...&offset=
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        text = request.query_params.get('q', '').strip()
+        limit = self.paginator.get_page_size(request)
+        try:
+            offset = max(int(request.query_params.get('offset', 0)), 0)
+        except ValueError:
+            offset = 0
+
+        ranked = get_backend(self.get_queryset().db).search(text, limit + 1, offset) if text else []
+        next_url = None
+        if len(ranked) > limit:
+            ranked = ranked[:limit]
+            next_url = replace_query_param(request.build_absolute_uri(), 'offset', offset + limit)
+
+        posts = self.get_queryset().in_bulk([post_id for post_id, _ in ranked])
+        results = []
+        for post_id, score in ranked:
+            if post_id in posts:
+                results.append({**self.get_serializer(posts[post_id]).data, 'score': score})
+        return Response({'next': next_url, 'results': results})
+
+    # Most active posts by time-decayed likes and comments, precomputed by posts.trending
+    @action(detail=False, methods=['get'])
+    def trending(self, request):
+        limit = self.paginator.get_page_size(request)
+        try:
+            offset = max(int(request.query_params.get('offset', 0)), 0)
+        except ValueError:
+            offset = 0
+
+        ranked = trending.trending()
+        next_url = None
+        if len(ranked) > offset + limit:
+            next_url = replace_query_param(request.build_absolute_uri(), 'offset', offset + limit)
+        ranked = ranked[offset:offset + limit]
+
+        posts = self.get_queryset().in_bulk([post_id for post_id, _ in ranked])
+        results = []
+        for post_id, score in ranked:
+            if post_id in posts:
+                results.append({**self.get_serializer(posts[post_id]).data, 'score': score})
+        return Response({'next': next_url, 'results': results})
+
+
+class CommentViewSet(CachedListMixin, OptimizedQuerysetMixin, viewsets.ModelViewSet):
+    queryset = Comment.objects.all().order_by('-created_at', '-id')
+    cache_namespace = 'comments'
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
 
@@ -44,44 +143,104 @@ class CommentViewSet(viewsets.ModelViewSet):
     filterset_fields = ['post', 'author']
     ordering_fields = ['created_at']
 
+    @transaction.atomic
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
-
-
-class FeedView(ListAPIView):
+        comment = serializer.save(author=self.request.user)
+        Post.objects.filter(pk=comment.post_id).update(
+            comments_count=F('comments_count') + 1, **trending.bump(trending.comment_weight()),
+        )
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        post_id = instance.post_id
+        instance.delete()
+        Post.objects.filter(pk=post_id).update(
+            comments_count=F('comments_count') - 1, **trending.bump(-trending.comment_weight()),
+        )
+
+
+class FeedView(OptimizedQuerysetMixin, ListAPIView):
+    queryset = Post.objects.all()
     serializer_class = PostSerializer
     permission_classes = [IsAuthenticated]
 
-    def get_queryset(self):
-        following_users = self.request.user.following.all()
-        return Post.objects.filter(author__in=following_users).order_by('-created_at')
+    # Pushed feed rows merged with posts pulled from followed celebrities (see posts.feed)
+    def list(self, request, *args, **kwargs):
+        queryset = self.get_queryset()
+        posts = self.paginator.paginate_stream(
+            lambda limit, before: feed.engine.get_feed(request.user, limit, before, queryset=queryset),
+            Post, request, view=self,
+        )
+        serializer = self.get_serializer(posts, many=True)
+        return self.get_paginated_response(serializer.data)
     
 
+class PostCommentsView(OptimizedQuerysetMixin, ListAPIView):
+    """
+    One post's comments, oldest first, keyset-paged on (created_at, id) over
+    comment_thread_idx. `?stream=1` returns the whole thread as a single JSON
+    array, written in keyset batches so memory stays flat for very long threads.
+    """
+    queryset = Comment.objects.all()
+    serializer_class = CommentSerializer
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+
+    def get_queryset(self):
+        return super().get_queryset().filter(post_id=self.kwargs['pk']).order_by('created_at', 'id')
+
+    def list(self, request, *args, **kwargs):
+        if not Post.objects.filter(pk=self.kwargs['pk']).exists():
+            raise NotFound()
+        if request.query_params.get('stream') in ('1', 'true'):
+            return StreamingHttpResponse(self.stream(self.get_queryset()), content_type='application/json')
+        return super().list(request, *args, **kwargs)
+
+    def stream(self, queryset):
+        batch_size = getattr(settings, 'COMMENT_STREAM_BATCH_SIZE', 500)
+        separator = '['
+        batch = list(queryset[:batch_size])
+        while batch:
+            rows = (json.dumps(data, cls=DjangoJSONEncoder) for data in self.get_serializer(batch, many=True).data)
+            yield separator + ','.join(rows)
+            separator = ','
+            if len(batch) < batch_size:
+                break
+            created_at, last_id = batch[-1].created_at, batch[-1].id
+            # A fresh query per batch rather than one long-lived cursor held open for a slow client
+            batch = list(queryset.filter(
+                Q(created_at__gte=created_at),
+                Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=last_id),
+            )[:batch_size])
+        yield '[]' if separator == '[' else ']'
+
+
 class LikePostView(APIView):
     permission_classes = [IsAuthenticated]
 
+    # Idempotent: liking twice is a no-op; the post is only looked up to report a 404
     def post(self, request, pk):
-        post = generics.get_object_or_404(Post, pk=pk)
-        like, created = Like.objects.get_or_create(user=request.user, post=post)
-
-        if not created:
-            return Response({"detail": "Already liked"}, status=400)
-
-        if post.author != request.user:
-            Notification.objects.create(
-                recipient=post.author,
-                actor=request.user,
-                verb="liked your post",
-                target=post
-            )
-
+        if not likes.like_posts(request.user, [pk]) and not Post.objects.filter(pk=pk).exists():
+            raise NotFound()
         return Response({"detail": "Post liked"})
-    
+
 
 class UnlikePostView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, pk):
-        post = generics.get_object_or_404(Post, pk=pk)
-        Like.objects.filter(user=request.user, post=post).delete()
-        return Response({"detail": "Post unliked"})
\ No newline at end of file
+        if not likes.unlike_posts(request.user, [pk]) and not Post.objects.filter(pk=pk).exists():
+            raise NotFound()
+        return Response({"detail": "Post unliked"})
+
+
+class BatchLikeView(APIView):
+    permission_classes = [IsAuthenticated]
+    serializer_class = BatchLikeSerializer
+
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response({
+            'liked': likes.like_posts(request.user, serializer.validated_data['like']),
+            'unliked': likes.unlike_posts(request.user, serializer.validated_data['unlike']),
+        })
@@ -0,0 +1,197 @@
+"""
+Synthetic data and an endpoint harness for the benchmark_api and benchmark_feed commands.
+
+Everything here writes with bulk_create and is meant to run inside a transaction
+that the caller rolls back.
+"""
+import json
+import random
+import re
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+
+from notifications.models import Notification
+from posts import feed
+from posts.models import Post, Like
+
+User = get_user_model()
+Follow = User.followers.through
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def zipf_degrees(count, maximum, skew):
+    """Power-law degrees: the item of rank r gets maximum / r ** skew, at least 1 and at most count - 1."""
+    return [min(count - 1, max(1, int(maximum / rank ** skew))) for rank in range(1, count + 1)]
+
+
+def generate_users(count):
+    return User.objects.bulk_create(
+        [User(username=f'bench-{i}-{random.getrandbits(32)}', password='!') for i in range(count)]
+    )
+
+
+def generate_follows(users, max_followers, skew):
+    """Follow edges with Zipf-distributed follower counts; sets followers_count and following_count."""
+    edges = []
+    following = dict.fromkeys((user.id for user in users), 0)
+    for author, degree in zip(users, zipf_degrees(len(users), max_followers, skew)):
+        followers = [user for user in random.sample(users, degree + 1) if user.id != author.id][:degree]
+        edges += [Follow(from_customuser_id=author.id, to_customuser_id=follower.id) for follower in followers]
+        author.followers_count = len(followers)
+        for follower in followers:
+            following[follower.id] += 1
+    for user in users:
+        user.following_count = following[user.id]
+    Follow.objects.bulk_create(edges, batch_size=5000)
+    User.objects.bulk_update(users, ['followers_count', 'following_count'], batch_size=1000)
+    return edges
+
+
+def generate_posts(users, posts_per_user):
+    posts = [
+        Post(author=user, title=f'Post {n}', content='Synthetic benchmark post')
+        for user in users for n in range(posts_per_user)
+    ]
+    random.shuffle(posts)
+    return Post.objects.bulk_create(posts, batch_size=5000)
+
+
+def generate_likes(users, posts, max_likes, skew):
+    """Zipf-distributed likes over posts, each with the notification its author would have received."""
+    ranked = random.sample(posts, len(posts))
+    post_type = ContentType.objects.get_for_model(Post)
+    likes, notifications = [], []
+    for post, degree in zip(ranked, zipf_degrees(len(ranked), max_likes, skew)):
+        likers = random.sample(users, min(degree, len(users)))
+        likes += [Like(user=liker, post=post) for liker in likers]
+        post.likes_count = len(likers)
+        notifications += [
+            Notification(
+                recipient_id=post.author_id, actor=liker, verb='liked your post',
+                target_content_type=post_type, target_object_id=post.id,
+            )
+            for liker in likers if liker.id != post.author_id
+        ]
+    Like.objects.bulk_create(likes, batch_size=5000)
+    Post.objects.bulk_update(ranked, ['likes_count'], batch_size=1000)
+    Notification.objects.bulk_create(notifications, batch_size=5000)
+    return likes, notifications
+
+
+def generate(users=500, posts_per_user=5, max_followers=300, max_likes=200, skew=1.1):
+    """Build a whole synthetic network and fan its posts out to feeds; returns the users."""
+    users = generate_users(users)
+    edges = generate_follows(users, max_followers, skew)
+    posts = generate_posts(users, posts_per_user)
+    likes, notifications = generate_likes(users, posts, max_likes, skew)
+    by_author = {}
+    for post in posts:
+        by_author.setdefault(post.author_id, []).append(post)
+    for user in users:
+        feed.engine.publish_many(user, by_author.get(user.id, []))
+    return users, {
+        'users': len(users), 'follows': len(edges), 'posts': len(posts),
+        'likes': len(likes), 'notifications': len(notifications),
+    }
+
+
+# SQLite reports a seek as "SEARCH <table>" and a read of the whole table as a bare
+# "SCAN <table>"; "SCAN <table> USING INDEX" walks an index in order and stops at the LIMIT
+SQLITE_SCAN = re.compile(r'^SCAN (?!CONSTANT ROW)\S+$')
+
+
+def count_scans(sql):
+    """Plan steps reading a whole table (no index at all) for one query."""
+    if not sql.lstrip().upper().startswith('SELECT'):
+        return 0
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return sum(1 for row in cursor.fetchall() if SQLITE_SCAN.match(row[-1]))
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+            return json.dumps(cursor.fetchone()[0]).count('"Seq Scan"')
+    return 0
+
+
+class Endpoint:
+    """One benchmarked request; `path` may be a callable receiving the reading user."""
+
+    def __init__(self, name, path, method='get'):
+        self.name = name
+        self.path = path
+        self.method = method
+
+    def url(self, user):
+        return self.path(user) if callable(self.path) else self.path
+
+
+def measure(endpoint, readers, requests, rounds=1):
+    """
+    Issue `requests` authenticated requests, cycling through `readers`, after one
+    untimed warm-up request per reader, and repeat that `rounds` times.
+
+    Returns the median of the per-round median latencies and the p99 over every
+    sample, in ms, and the worst query count and number of full scans seen on any
+    single request.
+    """
+    client = Client()
+    tokens = {user.id: Token.objects.get_or_create(user=user)[0].key for user in readers}
+
+    def request(reader):
+        url = endpoint.url(reader)
+        response = getattr(client, endpoint.method)(url, secure=True, HTTP_AUTHORIZATION=f'Token {tokens[reader.id]}')
+        if response.status_code >= 400:
+            raise RuntimeError(f'{endpoint.name}: {url} answered {response.status_code}')
+
+    for reader in readers:
+        request(reader)
+    samples, medians, queries, scans = [], [], 0, 0
+    for _ in range(rounds):
+        timings = []
+        for n in range(requests):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                request(readers[n % len(readers)])
+                timings.append((time.perf_counter() - started) * 1000)
+            queries = max(queries, len(captured))
+            scans = max(scans, sum(count_scans(query['sql']) for query in captured))
+        samples += timings
+        medians.append(statistics.median(timings))
+    return {
+        'queries': queries,
+        'scans': scans,
+        'p50_ms': round(statistics.median(medians), 2),
+        'p99_ms': round(percentile(samples, 99), 2),
+    }
+
+
+def regressions(results, baseline, tolerance):
+    """
+    Compare results with a baseline. Query and scan counts must not grow at all;
+    p50 latency may grow by `tolerance` (0.5 = 50%) before it counts. p99 is only
+    reported: a tail of a few hundred samples is too noisy to gate on.
+    """
+    failures = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        for metric in ('queries', 'scans'):
+            if result[metric] > expected[metric]:
+                failures.append(f'{name}: {metric} {expected[metric]} -> {result[metric]}')
+        if result['p50_ms'] > expected['p50_ms'] * (1 + tolerance):
+            failures.append(f"{name}: p50_ms {expected['p50_ms']} -> {result['p50_ms']}")
+    return failures
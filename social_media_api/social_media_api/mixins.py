@@ -0,0 +1,52 @@
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def _loading_plan(serializer_class):
+    """
+    Work out (select_related, prefetch_related, only) for a serializer class.
+
+    Serializers declare the relations they read in their Meta:
+
+        select_related = {'author': ['username']}   # relation -> columns read from it
+        prefetch_related = ['tags']
+
+    Columns of the model itself are taken from the serializer's own fields, so
+    `only()` loads exactly what is rendered.
+    """
+    meta = serializer_class.Meta
+    model = meta.model
+    select_related = getattr(meta, 'select_related', {})
+    prefetch_related = tuple(getattr(meta, 'prefetch_related', ()))
+
+    concrete = {field.name for field in model._meta.concrete_fields}
+    only = {model._meta.pk.name}
+    for field in serializer_class().fields.values():
+        source = field.source.split('.')[0]
+        if source in concrete:
+            only.add(source)
+    for relation, columns in select_related.items():
+        only.add(relation)
+        only.update(f'{relation}__{column}' for column in columns)
+
+    return tuple(select_related), prefetch_related, tuple(sorted(only))
+
+
+def optimize_queryset(queryset, serializer_class):
+    select_related, prefetch_related, only = _loading_plan(serializer_class)
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*prefetch_related)
+    return queryset.only(*only)
+
+
+class OptimizedQuerysetMixin:
+    """
+    Build select_related/prefetch_related/only() for the view's queryset from the
+    relations its serializer declares, so list endpoints run a fixed number of
+    queries whatever the page size.
+    """
+
+    def get_queryset(self):
+        return optimize_queryset(super().get_queryset(), self.get_serializer_class())
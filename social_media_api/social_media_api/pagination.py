@@ -0,0 +1,167 @@
+import base64
+import binascii
+import json
+from collections import namedtuple
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+Cursor = namedtuple('Cursor', ['position', 'reverse'])
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination keyed on a unique tuple of columns, `(created_at, id)` by default.
+
+    Each page is fetched with `WHERE (created_at, id) < cursor ORDER BY ... LIMIT n`,
+    so there is no COUNT query and deep pages cost the same as the first one as long
+    as a matching composite index exists. Views may set `keyset_fields` to page on
+    other columns, e.g. `('timestamp', 'id')`. The direction follows the first
+    ordering of the (already filtered) queryset, so `?ordering=created_at` still works.
+    """
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    keyset_fields = ('created_at', 'id')
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.fields = getattr(view, 'keyset_fields', self.keyset_fields)
+        cursor = self.decode_cursor(request, queryset.model)
+
+        descending = self.is_descending(queryset)
+        if cursor is not None and cursor.reverse:
+            descending = not descending
+        sign = '-' if descending else ''
+        queryset = queryset.order_by(*[sign + field for field in self.fields])
+        if cursor is not None:
+            queryset = queryset.filter(self.after(cursor.position, descending))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if cursor is not None and cursor.reverse:
+            results.reverse()
+            self.set_links(results, has_next=True, has_previous=has_more)
+        else:
+            self.set_links(results, has_next=has_more, has_previous=cursor is not None)
+        return results
+
+    def paginate_stream(self, fetch, model, request, view=None):
+        """
+        Paginate forward through a source that is not a queryset.
+
+        `fetch(limit, before)` must return up to `limit` objects ordered by the keyset
+        fields, descending, strictly after the `before` position (or from the start).
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.fields = getattr(view, 'keyset_fields', self.keyset_fields)
+        cursor = self.decode_cursor(request, model)
+        if cursor is not None and cursor.reverse:
+            raise NotFound(self.invalid_cursor_message)
+
+        results = list(fetch(self.page_size + 1, cursor.position if cursor else None))
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        self.set_links(results, has_next=has_more, has_previous=False)
+        return results
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                page_size = int(request.query_params[self.page_size_query_param])
+                if page_size > 0:
+                    return min(page_size, self.max_page_size)
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def is_descending(self, queryset):
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+        if not ordering:
+            return True
+        first = ordering[0]
+        return isinstance(first, str) and first.startswith('-')
+
+    def after(self, position, descending):
+        # (a, b) < (x, y)  <=>  a < x OR (a = x AND b < y)
+        lookup = 'lt' if descending else 'gt'
+        condition = Q()
+        for index, field in enumerate(self.fields):
+            clause = Q(**{f'{field}__{lookup}': position[index]})
+            for previous, value in zip(self.fields[:index], position[:index]):
+                clause &= Q(**{previous: value})
+            condition |= clause
+        # Redundant bound on the leading column so the planner can seek the index
+        # instead of scanning it from the start and filtering
+        return Q(**{f'{self.fields[0]}__{lookup}e': position[0]}) & condition
+
+    def position(self, obj):
+        return tuple(getattr(obj, field) for field in self.fields)
+
+    def set_links(self, results, has_next, has_previous):
+        self.next_cursor = Cursor(self.position(results[-1]), False) if has_next and results else None
+        self.previous_cursor = Cursor(self.position(results[0]), True) if has_previous and results else None
+
+    def encode_cursor(self, cursor):
+        values = [value.isoformat() if hasattr(value, 'isoformat') else value for value in cursor.position]
+        payload = json.dumps({'p': values, 'r': cursor.reverse}, separators=(',', ':'))
+        encoded = base64.urlsafe_b64encode(payload.encode()).decode()
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            values = payload['p']
+            if len(values) != len(self.fields):
+                raise ValueError
+            position = tuple(
+                model._meta.get_field(field).to_python(value)
+                for field, value in zip(self.fields, values)
+            )
+            return Cursor(position, bool(payload.get('r')))
+        except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError,
+                FieldDoesNotExist, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        return self.encode_cursor(self.next_cursor)
+
+    def get_previous_link(self):
+        if self.previous_cursor is None:
+            return None
+        return self.encode_cursor(self.previous_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -11,12 +11,16 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
+import sys
 import os
 
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Apps shared by every project in the repository (profiling) live in <repo>/shared
+sys.path.append(str(BASE_DIR.parent / 'shared'))
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -66,9 +70,11 @@ INSTALLED_APPS = [
     'accounts',
     'posts',
     'notifications',
+    'profiling',
 ]
 
 MIDDLEWARE = [
+    'profiling.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -140,16 +146,37 @@ DATABASES = {
     }
 }
 
+# Cache
+# The list cache and unread badge counts are invalidated by writing to this cache,
+# so every worker process must share it: set REDIS_URL in any deployment with more
+# than one process. The local-memory fallback is only correct for a single process
+# (runserver, tests)
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'accounts.authentication.CachedTokenAuthentication',
     ],
 
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
 
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    # Keyset (cursor) pagination on (created_at, id): no COUNT query, constant-cost deep pages
+    'DEFAULT_PAGINATION_CLASS': 'social_media_api.pagination.KeysetPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -158,6 +185,61 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Home feed (fan-out on write)
+FEED_BACKFILL_LIMIT = 100  # recent posts copied into a feed when following someone
+FEED_BATCH_SIZE = 1000
+FEED_CELEBRITY_THRESHOLD = 10000  # authors with this many followers are pulled at read time instead
+
+# Notification pipeline (batched, coalesced writes off the request path)
+NOTIFICATION_ASYNC = True
+NOTIFICATION_BATCH_SIZE = 500
+NOTIFICATION_FLUSH_INTERVAL = 0.5  # seconds the worker waits to fill a batch
+NOTIFICATION_COALESCE_WINDOW = 3600  # seconds during which repeats fold into one unread row
+NOTIFICATION_UNREAD_CACHE_TIMEOUT = 300  # seconds an unread badge count stays cached
+NOTIFICATION_STREAM_HEARTBEAT = 15  # seconds between keep-alive comments on /api/notifications/stream/
+NOTIFICATION_STREAM_TIMEOUT = 300  # seconds before a stream closes and the client reconnects
+NOTIFICATION_BACKLOG_RETENTION = 600  # seconds a user's stream backlog is kept once no client is connected
+
+# Anonymous post/comment list pages (invalidated by model signals, see posts.cache)
+LIST_CACHE_TIMEOUT = 60
+
+# Comments written per query by /posts/<id>/comments/?stream=1
+COMMENT_STREAM_BATCH_SIZE = 500
+
+# Trending posts (posts.trending; refresh with the refresh_trending command)
+TRENDING_HALF_LIFE = 6 * 3600  # seconds for a like or comment to lose half its weight
+TRENDING_LIKE_WEIGHT = 1
+TRENDING_COMMENT_WEIGHT = 3
+TRENDING_FLOOR = 0.01  # scores decayed below this are dropped at the next refresh
+TRENDING_SIZE = 100  # posts kept in the precomputed ranking
+TRENDING_REFRESH_INTERVAL = 300
+
+# Bulk post import (POST /posts/bulk/ and the import_posts command)
+POST_IMPORT_BATCH_SIZE = 1000
+
+# In-memory follow graph (accounts.graph) behind mutuals and suggestions
+FOLLOW_GRAPH_SYNC_INTERVAL = 30  # seconds between pulls of follows written by other processes
+FOLLOW_GRAPH_REBUILD_INTERVAL = 3600  # seconds between full reloads, which also drop unfollows made elsewhere
+
+# Profile picture thumbnails (accounts.avatars), built by a worker pool after upload
+AVATAR_SIZES = {'large': 512, 'medium': 128, 'small': 48}  # square edge in pixels
+AVATAR_ASYNC = True
+AVATAR_WORKERS = 2
+# Any STORAGES-style entry; the filesystem (under MEDIA_ROOT) stands in for
+# storages.backends.s3boto3.S3Boto3Storage outside production
+AVATAR_STORAGE = {'BACKEND': 'django.core.files.storage.FileSystemStorage'}
+
+# Token -> user lookups cached per process by accounts.authentication
+AUTH_TOKEN_CACHE_SIZE = 10000
+AUTH_TOKEN_CACHE_TIMEOUT = 60  # seconds; bounds staleness for changes made by other processes
+
+# Per-request query and latency records (profiling app), dumped as JSON at /profiling/ for staff
+PROFILING_ENABLED = True
+PROFILING_BUFFER_SIZE = 500  # requests kept per process
+PROFILING_N_PLUS_ONE_THRESHOLD = 5  # repeats of one query fingerprint flagged as a likely N+1
+PROFILING_CPROFILE_SAMPLE_RATE = 0  # share of requests run under cProfile, e.g. 0.01
+PROFILING_SLOW_MS = 500  # sampled profiles are kept only for requests at least this slow
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -22,5 +22,6 @@ urlpatterns = [
     path('api/accounts/', include('accounts.urls')),
     path('api/posts', include('posts.urls')),
     path('api/notifications/', include('notifications.urls')),
+    path('profiling/', include('profiling.urls')),
 
 ]